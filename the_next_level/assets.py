@@ -0,0 +1,131 @@
+"""Pré-carregamento dos assets do jogo a partir de um manifesto.
+
+Todas as imagens, sons e músicas são descodificados numa thread antes do
+menu, para não haver pausas na primeira vez que cada um é usado. Um ficheiro
+do manifesto em falta faz o arranque falhar logo.
+
+Exemplo (mostra o tempo de cada asset):
+    python assets.py
+"""
+import os
+import threading
+import time
+
+import pygame
+
+ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tudo o que o jogo pode carregar, por pasta, com a extensão do ficheiro.
+MANIFEST = {
+    'images': (
+        'button_exit.png', 'button_music_off.png', 'button_music_on.png', 'button_start.png',
+        'closed_door.png', 'door.png', 'menu_background.png', 'red_potion.png',
+        'floor.png', 'wall.png', 'wall_2.png', 'escada.png', 'estatua.png', 'ferro.png',
+        'tile_0109.png', 'tile_0121.png',
+        'player_idle_1.png', 'player_idle_2.png', 'player_idle_left_1.png', 'player_idle_left_2.png',
+        'player_walk_1.png', 'player_walk_2.png',
+        'player_attack_1.png', 'player_attack_2.png',
+        'enemy_idle.png', 'enemy_walk_1.png', 'enemy_walk_2.png',
+        'ghost_walk_1.png', 'ghost_walk_2.png', 'cyclops_walk_1.png', 'cyclops_walk_2.png',
+    ),
+    'sounds': ('hit.ogg',),
+    'music': ('background_music.ogg',),
+}
+
+class AssetLoader:
+    """Descodifica os assets do manifesto numa thread e instala-os nos loaders do pgzero."""
+    def __init__(self, manifest=MANIFEST, root=ASSETS_DIR):
+        self.manifest = manifest
+        self.root = root
+        self.entries = [(kind, filename) for kind, filenames in manifest.items() for filename in filenames]
+        self.loaded = {}   # (pasta, ficheiro) -> objeto descodificado
+        self.timings = {}  # (pasta, ficheiro) -> segundos
+        self.error = None
+        self.thread = None
+        self.started = self.elapsed = None
+
+    def path(self, kind, filename):
+        return os.path.join(self.root, kind, filename)
+
+    def missing(self):
+        """Ficheiros do manifesto que não existem."""
+        return [os.path.join(kind, filename) for kind, filename in self.entries
+                if not os.path.isfile(self.path(kind, filename))]
+
+    def start(self):
+        """Verifica o manifesto e começa a descodificar em segundo plano."""
+        missing = self.missing()
+        if missing:
+            raise FileNotFoundError("Assets em falta: " + ", ".join(missing))
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name='asset-preload', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        # Na thread só se descodifica; a conversão para o formato do ecrã fica para finish().
+        try:
+            for kind, filename in self.entries:
+                start = time.perf_counter()
+                self.loaded[kind, filename] = self.decode(kind, self.path(kind, filename))
+                self.timings[kind, filename] = time.perf_counter() - start
+        except Exception as e:
+            self.error = e
+
+    def decode(self, kind, path):
+        if kind == 'images':
+            return pygame.image.load(path)
+        if kind == 'sounds':
+            # Sem mixer (ex.: sem placa de som) o jogo não toca sons; basta o ficheiro existir.
+            return pygame.mixer.Sound(path) if pygame.mixer.get_init() else None
+        # A música é lida em streaming pelo pygame; ler o ficheiro aquece a cache do sistema.
+        with open(path, 'rb') as f:
+            f.read()
+        return path
+
+    def progress(self):
+        """(assets prontos, total)."""
+        return len(self.timings), len(self.entries)
+
+    def done(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def finish(self, images=None, sounds=None):
+        """Espera pela thread, converte as imagens e guarda-as nas caches do pgzero.
+
+        `images` e `sounds` são os loaders do pgzero; sem eles, os assets ficam
+        só em `loaded`.
+        """
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        for (kind, filename), asset in self.loaded.items():
+            name = os.path.splitext(filename)[0]
+            if kind == 'images':
+                start = time.perf_counter()
+                asset = self.loaded[kind, filename] = asset.convert_alpha()
+                self.timings[kind, filename] += time.perf_counter() - start
+                if images is not None:
+                    images.cache[images.cache_key(name, (), {})] = asset
+            elif kind == 'sounds' and asset is not None and sounds is not None:
+                sounds.cache[sounds.cache_key(name, (), {})] = asset
+        self.elapsed = time.perf_counter() - self.started
+
+    def report(self, slowest=5):
+        """Resumo do arranque: tempo total e os assets mais lentos."""
+        ranked = sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
+        lines = [f"{len(self.timings)} assets em {self.elapsed * 1000:.1f} ms"]
+        lines += [f"  {os.path.join(*key):<32}{seconds * 1000:8.2f} ms" for key, seconds in ranked[:slowest]]
+        return lines
+
+def main():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    loader = AssetLoader()
+    loader.start()
+    loader.finish()
+    print("\n".join(loader.report(slowest=len(loader.entries))))
+
+if __name__ == '__main__':
+    main()
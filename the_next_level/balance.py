@@ -0,0 +1,248 @@
+"""Corre milhares de níveis semeados com um bot, em paralelo, e resume o balanceamento por nível.
+
+Cada corrida joga um só nível, com as vidas cheias, até o bot chegar à porta,
+morrer ou esgotar o tempo. As corridas são distribuídas por um pool de
+processos (um por núcleo) e os resultados juntados por nível.
+
+`--set` muda uma constante de engine.py ou um atributo de classe antes de
+jogar, para comparar variantes.
+
+Exemplos:
+    python balance.py --runs 1000
+    python balance.py --runs 500 --set ATTACK_COOLDOWN=0.3 --set Cyclops.max_health=2
+    python balance.py --runs 200 --levels 4 5 --output balance.json
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+from engine import LOGIC_DT, MAX_LEVELS, TILE_SIZE, InputState, World
+from pathfinding import FlowField
+
+DEFAULT_MAX_SECONDS = 180  # tempo de jogo por nível antes de desistir
+
+# O ataque do jogador é um quadrado de um tile encostado ao seu lado; o bot
+# ataca quando o inimigo está à sua frente e a esta distância.
+ATTACK_REACH_X = 28
+ATTACK_REACH_Y = 12
+SAFE_DISTANCE = 18  # mais perto do que isto o inimigo toca no jogador
+FIRING_DISTANCE = 24  # onde o bot se põe para atacar, ao lado do inimigo
+CLOSE_RANGE = 48  # na linha do inimigo e a esta distância, o bot deixa o caminho e ataca
+LOW_LIVES = 2  # com estas vidas ou menos, o bot vai primeiro às poções
+
+class BotInput(InputState):
+    """Bot simples: vai às poções se estiver fraco, caça o inimigo mais próximo e depois sai pela porta."""
+    __slots__ = ('world', 'field', 'last_move')
+
+    def __init__(self, world):
+        super().__init__()
+        self.world = world
+        self.field = None
+        self.last_move = None
+
+    def step(self):
+        """Escolhe as teclas premidas no próximo tick."""
+        self.a = self.d = self.w = self.s = self.space = False
+        world = self.world
+        player = world.player
+        if player is None or world.state != 'playing':
+            return
+        px, py = player.x, player.y
+
+        def distance_sq(entity):
+            return (entity.x - px)**2 + (entity.y - py)**2
+
+        if world.potions and world.player_lives <= LOW_LIVES:
+            potion = min(world.potions, key=distance_sq)
+            self.go_to(potion.x, potion.y)
+        elif world.enemies:
+            enemy = min(world.enemies, key=distance_sq)
+            dx, dy = enemy.x - px, enemy.y - py
+            if abs(dy) < ATTACK_REACH_Y and abs(dx) < CLOSE_RANGE:
+                self.fight(player, dx, dy)
+            else:
+                self.go_to(*self.firing_spot(enemy, -1 if dx > 0 else 1))
+        elif world.is_door_open and world.door:
+            self.go_to(world.door.x, world.door.y)
+
+    def fight(self, player, dx, dy):
+        """Combate a um inimigo na mesma linha, a (dx, dy).
+
+        O jogador deixa de virar para cima ou para baixo depois de andar na
+        horizontal, por isso o bot só ataca de lado: fica a uma distância que
+        o ataque alcance sem lhe tocar e vira-se para ele.
+        """
+        facing = 1 if player.direction == 'right' else -1 if player.direction == 'left' else 0
+        side = 1 if dx > 0 else -1
+        if 0 < dx * facing < ATTACK_REACH_X:
+            self.space = player.attack_cooldown_timer <= 0
+        elif abs(dx) < SAFE_DISTANCE:
+            self.steer(-side, dy, horizontal=True)  # afastar-se para ganhar espaço
+        else:
+            self.steer(side, dy, horizontal=True)  # virar-se ou aproximar-se
+
+    def firing_spot(self, enemy, side):
+        """Ponto ao lado do inimigo de onde o ataque o alcança, do lado `side` se houver espaço."""
+        tilemap = self.world.tilemap
+        for offset in (side * FIRING_DISTANCE, -side * FIRING_DISTANCE):
+            x = enemy.x + offset
+            if not tilemap.is_solid(int(x // TILE_SIZE), int(enemy.y // TILE_SIZE)):
+                return x, enemy.y
+        return enemy.x, enemy.y
+
+    def go_to(self, x, y):
+        """Dá um passo em direção a (x, y), pelo caminho mais curto entre as paredes."""
+        world = self.world
+        if self.field is None or self.field.solid is not world.tilemap.solid:
+            self.field = FlowField(world.tilemap, max_steps=world.tilemap.width * world.tilemap.height,
+                                   clearance=False)
+        self.field.update(x, y)
+        player = world.player
+        target_x, target_y = self.field.next_step(player.x, player.y) or (x, y)
+        dx, dy = target_x - player.x, target_y - player.y
+        self.steer(dx, dy, horizontal=abs(dx) >= abs(dy))
+
+    def steer(self, dx, dy, horizontal):
+        """Prime a tecla de um só eixo (o jogador não anda na diagonal).
+
+        Se o passo anterior bateu numa parede, o jogador está desalinhado do
+        corredor: dá um passo no outro eixo, mesmo que passe do centro.
+        """
+        position = self.world.player.x, self.world.player.y
+        if self.last_move is not None and self.last_move[0] == position:
+            horizontal = not self.last_move[1]
+        if horizontal and dx:
+            self.a, self.d = dx < 0, dx > 0
+        elif not horizontal and dy:
+            self.w, self.s = dy < 0, dy > 0
+        self.last_move = position, horizontal
+
+def apply_overrides(overrides):
+    """Aplica as alterações de `--set` (nome ou Classe.atributo -> valor) ao módulo engine."""
+    for name, value in overrides.items():
+        if '.' in name:
+            class_name, attribute = name.split('.', 1)
+            cls = getattr(engine, class_name)
+            # Os atributos de cada instância (__slots__) não têm valor na classe.
+            if not hasattr(cls, attribute) or isinstance(getattr(cls, attribute), types.MemberDescriptorType):
+                raise AttributeError(f"{class_name} não tem o atributo de classe {attribute}.")
+            setattr(cls, attribute, value)
+        else:
+            if not hasattr(engine, name):
+                raise AttributeError(f"engine não tem a constante {name}.")
+            setattr(engine, name, value)
+
+def play_level(level, seed, max_ticks):
+    """Joga o nível `level` da semente `seed`; devolve (nível, resultado, passos, dano, poções)."""
+    world = World(seed=seed, use_line_of_sight=True)  # as mesmas regras do jogo
+    world.input = bot = BotInput(world)
+    world.start(level)
+    # Toques e poções contam-se como eventos, não pela diferença de vidas ou
+    # de poções em cada passo: um toque e uma poção no mesmo passo não se
+    # anulam, e a poção do nível seguinte, criada ao passar a porta, não entra.
+    damage = 0
+    apply_damage = world.damage_player
+
+    def damage_player(enemy):
+        nonlocal damage
+        lives = world.player_lives
+        apply_damage(enemy)
+        damage += lives - world.player_lives
+
+    world.damage_player = damage_player
+    # O próximo nível recebe uma lista nova; desta só saem as poções apanhadas.
+    level_potions = world.potions
+    placed_potions = len(level_potions)
+    ticks = 0
+    while ticks < max_ticks and world.current_level == level and world.state == 'playing':
+        bot.step()
+        world.update(LOGIC_DT)
+        ticks += 1
+    potions = placed_potions - len(level_potions)
+    if world.state == 'game_over':
+        outcome = 'death'
+    elif world.current_level == level and world.state == 'playing':
+        outcome = 'timeout'
+    else:
+        outcome = 'win'
+    return level, outcome, ticks, damage, potions
+
+def play_chunk(tasks):
+    return [play_level(*task) for task in tasks]
+
+def summarize(results):
+    """Junta os resultados por nível."""
+    by_level = {}
+    for level, *result in results:
+        by_level.setdefault(level, []).append(result)
+    summary = {}
+    for level, runs in sorted(by_level.items()):
+        outcomes = [outcome for outcome, *_ in runs]
+        clear_times = sorted(ticks * LOGIC_DT for outcome, ticks, _, _ in runs if outcome == 'win')
+        summary[level] = {
+            'runs': len(runs),
+            'win_rate': outcomes.count('win') / len(runs),
+            'deaths': outcomes.count('death'),
+            'timeouts': outcomes.count('timeout'),
+            'clear_time_median_s': statistics.median(clear_times) if clear_times else None,
+            'clear_time_p90_s': clear_times[int(len(clear_times) * 0.9)] if clear_times else None,
+            'damage_mean': statistics.fmean(damage for _, _, damage, _ in runs),
+            'potions_mean': statistics.fmean(potions for *_, potions in runs),
+        }
+    return summary
+
+def parse_override(text):
+    name, _, value = text.partition('=')
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"valor inválido em {text!r}") from None
+    return name, value
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=200, help="corridas por nível")
+    parser.add_argument('--levels', type=int, nargs='+', default=list(range(1, MAX_LEVELS + 1)))
+    parser.add_argument('--seed', type=int, default=0, help="primeira semente")
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                        help="tempo de jogo máximo por nível")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--set', dest='overrides', type=parse_override, action='append', default=[],
+                        metavar='NOME=VALOR', help="ex.: ATTACK_COOLDOWN=0.3, Ghost.speed=2, SPAWN_WEIGHTS=(10,5,4)")
+    parser.add_argument('--output', help="grava o resumo em JSON")
+    args = parser.parse_args()
+
+    overrides = dict(args.overrides)
+    apply_overrides(overrides)  # falha já se um nome estiver errado
+    max_ticks = int(args.max_seconds / LOGIC_DT)
+    tasks = [(level, args.seed + i, max_ticks) for level in args.levels for i in range(args.runs)]
+    # Blocos de corridas por processo, para o custo de comunicação não pesar.
+    chunk_size = max(1, len(tasks) // (args.workers * 8))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=apply_overrides, initargs=(overrides,)) as pool:
+        results = [result for chunk in pool.map(play_chunk, chunks) for result in chunk]
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print(f"{len(tasks)} níveis em {elapsed:.1f}s com {args.workers} processos")
+    print(f"{'nível':<7}{'vitórias':>9}{'mortes':>8}{'tempo esgotado':>16}"
+          f"{'tempo p50':>11}{'tempo p90':>11}{'dano':>7}{'poções':>8}")
+    for level, stats in summary.items():
+        p50, p90 = stats['clear_time_median_s'], stats['clear_time_p90_s']
+        print(f"{level:<7}{stats['win_rate']:>9.0%}{stats['deaths']:>8}{stats['timeouts']:>16}"
+              f"{'-' if p50 is None else f'{p50:.1f}s':>11}{'-' if p90 is None else f'{p90:.1f}s':>11}"
+              f"{stats['damage_mean']:>7.2f}{stats['potions_mean']:>8.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'overrides': {k: repr(v) for k, v in overrides.items()}, 'levels': summary}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
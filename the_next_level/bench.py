@@ -0,0 +1,309 @@
+"""Benchmarks dos caminhos críticos do jogo, com cenários semeados e repetíveis.
+
+Cada cenário mede o tempo por chamada, a memória que fica retida e o pico
+de memória de uma chamada, e o relatório sai em JSON para poder ser
+comparado entre revisões.
+
+Exemplos:
+    python bench.py --output base.json
+    python bench.py --compare base.json
+    python bench.py --filter update
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import Future
+
+# O desenho é feito numa superfície fora do ecrã; não é preciso abrir uma janela.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from pgzero import loaders
+from pgzero.screen import Screen
+
+from enemy_batch import np
+from engine import HEIGHT, MAP_HEIGHT, MAP_WIDTH, WIDTH, Cyclops, Enemy, Ghost, World, find_valid_spawn_points, generate_random_map, plan_level, plan_levels
+from pathfinding import FlowField
+from render import WorldRenderer
+from sight import VisibilityTable
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SAFE_SPAWN_DISTANCE = 250
+
+# === CENÁRIOS ===
+# Cada cenário recebe a semente e devolve a função, sem argumentos, a medir.
+SCENARIOS = {}
+
+def scenario(name):
+    """Regista uma função de preparação de cenário com o nome dado."""
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+def make_world(seed, enemy_count=None, batched=False, map_size=(MAP_WIDTH, MAP_HEIGHT), **options):
+    """Cria um World no primeiro nível, opcionalmente com `enemy_count` inimigos.
+
+    `options` são passadas ao World (ex.: use_line_of_sight=True).
+    """
+    world = World(batched_enemies=batched, seed=seed, map_size=map_size, **options)
+    world.start()
+    # Vidas "infinitas" para que o jogador não morra a meio da medição.
+    world.player_lives = 10**9
+    if enemy_count is not None:
+        # Os inimigos nascem longe do jogador, para que toques e recuos não
+        # entrem na medição do custo de atualizar todos.
+        px, py = world.player.x, world.player.y
+        spawn_points = [
+            (x, y) for x, y in find_valid_spawn_points(world.level_map)
+            if (x - px)**2 + (y - py)**2 > SAFE_SPAWN_DISTANCE**2
+        ]
+        rng = random.Random(seed)
+        world.set_enemies([
+            rng.choice([Enemy, Ghost, Cyclops])(world, *rng.choice(spawn_points))
+            for _ in range(enemy_count)
+        ])
+    return world
+
+@scenario('generate_random_map')
+def bench_generate_random_map(seed):
+    random.seed(seed)
+    return generate_random_map
+
+@scenario('setup_level')
+def bench_setup_level(seed):
+    world = make_world(seed)
+    level_map = world.level_map
+    return lambda: world.setup_level(level_map)
+
+@scenario('find_valid_spawn_points')
+def bench_find_valid_spawn_points(seed):
+    level_map = make_world(seed).level_map
+    return lambda: find_valid_spawn_points(level_map)
+
+@scenario('next_level')
+def bench_next_level(seed):
+    world = make_world(seed)
+
+    def run():
+        world.current_level = 0
+        world.next_level()
+    return run
+
+def bench_update(enemy_count, batched=False, map_size=(MAP_WIDTH, MAP_HEIGHT), **options):
+    def setup(seed):
+        world = make_world(seed, enemy_count, batched, map_size, **options)
+        return lambda: world.update(1 / 60)
+    return setup
+
+for _count in (5, 50, 500):
+    scenario(f'update_{_count}_enemies')(bench_update(_count))
+    if np is not None:
+        scenario(f'update_{_count}_enemies_batched')(bench_update(_count, batched=True))
+# Num mapa 8x8 vezes maior, a maior parte dos inimigos está fora do ecrã ou a dormir.
+scenario('update_500_enemies_large_map')(bench_update(500, map_size=(8 * MAP_WIDTH, 8 * MAP_HEIGHT)))
+# Linha de visão com cache por par de tiles e com a tabela pré-calculada.
+scenario('update_500_enemies_line_of_sight')(bench_update(500, use_line_of_sight=True))
+if np is not None:
+    scenario('update_500_enemies_visibility_table')(
+        bench_update(500, use_line_of_sight=True, precompute_visibility=True))
+
+@scenario('attack_500_enemies')
+def bench_attack(seed):
+    world = make_world(seed, 500)
+    player = world.player
+    for enemy in world.enemies:
+        enemy.health = 10**9
+
+    def run():
+        # Um golpe por tick, com o cooldown reposto, contra uma multidão longe do jogador.
+        player.attack_cooldown_timer = 0
+        player.attack()
+        world.update(1 / 60)
+    return run
+
+@scenario('plan_levels_batch')
+def bench_plan_levels_batch(seed):
+    # Todos os níveis de 20 partidas de uma vez, como para pré-gerar ou testar.
+    rng = random.Random(seed)
+    return lambda: plan_levels([(level, random.Random(rng.getrandbits(64))) for level in range(1, 6)] * 20)
+
+@scenario('next_level_prepared')
+def bench_next_level_prepared(seed):
+    world = make_world(seed)
+    rng = random.Random(seed)
+    plans = itertools.cycle([plan_level(1, rng) for _ in range(10)])
+
+    def run():
+        # Simula uma transição em que o trabalhador já terminou o nível seguinte.
+        future = Future()
+        future.set_result(next(plans))
+        world.prepared_level = future
+        world.current_level = 0
+        world.next_level()
+    return run
+
+@scenario('load_level_1000_enemies')
+def bench_load_level_1000_enemies(seed):
+    # Teste de carga: o mesmo nível com 1000 inimigos e 50 poções, montado vez
+    # após vez; a partir da segunda, as entidades saem do EntityPool.
+    world = make_world(seed)
+    rng = random.Random(seed)
+    plan = plan_level(1, rng)
+    spawn_points = find_valid_spawn_points(plan.level_map)
+    plan.enemy_spawns = [(rng.choice([Enemy, Ghost, Cyclops]), rng.choice(spawn_points)) for _ in range(1000)]
+    plan.potion_positions = [rng.choice(spawn_points) for _ in range(50)]
+    return lambda: world.load_level(plan)
+
+@scenario('flow_field_rebuild')
+def bench_flow_field_rebuild(seed):
+    world = make_world(seed)
+    field = FlowField(world.tilemap)
+    spawn_points = find_valid_spawn_points(world.level_map)
+    rng = random.Random(seed)
+
+    def run():
+        # Força um recálculo completo, como quando o jogador muda de tile.
+        field.player_cell = None
+        field.update(*rng.choice(spawn_points))
+    return run
+
+def bench_visibility_table_build(seed):
+    tilemap = make_world(seed).tilemap
+    return lambda: VisibilityTable(tilemap)
+
+if np is not None:
+    scenario('visibility_table_build')(bench_visibility_table_build)
+
+def bench_draw_playing(map_size, enemy_count):
+    def setup(seed):
+        world = make_world(seed, enemy_count, map_size=map_size)
+        screen = Screen(pygame.Surface((WIDTH, HEIGHT)))
+        renderer = WorldRenderer()
+        # O primeiro desenho compõe os blocos visíveis; a medição cobre os frames seguintes.
+        renderer.draw_playing(screen, world)
+        return lambda: renderer.draw_playing(screen, world)
+    return setup
+
+scenario('draw_playing')(bench_draw_playing((MAP_WIDTH, MAP_HEIGHT), 50))
+# Um mapa 64x maior com a mesma densidade de inimigos: o custo deve ficar perto do anterior.
+scenario('draw_playing_large_map')(bench_draw_playing((8 * MAP_WIDTH, 8 * MAP_HEIGHT), 64 * 50))
+
+# === MEDIÇÃO ===
+
+def measure(func, number, repeat):
+    """Mede `func` e devolve as estatísticas por chamada."""
+    func()  # aquecimento
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter_ns() - start) / number / 1000)
+
+    # A memória é medida numa passagem separada, porque o tracemalloc
+    # abranda bastante a execução. O tracemalloc só vê o que está alocado,
+    # não quantas alocações houve: a diferença entre os snapshots é o que
+    # ficou retido, e o pico de cada chamada (acima da memória com que ela
+    # começou) mostra os temporários.
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peak = 0
+    for _ in range(number):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+
+    return {
+        'calls': number * repeat,
+        'mean_us': statistics.fmean(samples),
+        'median_us': statistics.median(samples),
+        'min_us': min(samples),
+        'stdev_us': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'retained_blocks': sum(stat.count_diff for stat in stats) / number,
+        'retained_bytes': sum(stat.size_diff for stat in stats) / number,
+        'peak_bytes': peak,
+    }
+
+def git_revision():
+    """Devolve a revisão atual do repositório, se houver uma."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(names, seed, number, repeat):
+    """Executa os cenários indicados e devolve o relatório completo."""
+    results = {}
+    for name in names:
+        func = SCENARIOS[name](seed)
+        results[name] = measure(func, number, repeat)
+        print(f"{name:<28} {results[name]['median_us']:>12.1f} us/chamada", file=sys.stderr)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'number': number,
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+def print_comparison(report, baseline):
+    """Mostra a razão entre as medianas do relatório atual e de uma referência."""
+    print(f"{'cenário':<28} {'base (us)':>12} {'atual (us)':>12} {'razão':>8}")
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        ratio = result['median_us'] / base['median_us']
+        print(f"{name:<28} {base['median_us']:>12.1f} {result['median_us']:>12.1f} {ratio:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--number', type=int, default=20, help="chamadas por repetição")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='', help="só corre os cenários cujo nome contém este texto")
+    parser.add_argument('--output', help="ficheiro JSON onde guardar o relatório")
+    parser.add_argument('--compare', help="relatório JSON de referência para comparação")
+    args = parser.parse_args()
+
+    loaders.set_root(BENCH_DIR)
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+    names = [name for name in SCENARIOS if args.filter in name]
+    report = run_benchmarks(names, args.seed, args.number, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
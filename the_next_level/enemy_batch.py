@@ -0,0 +1,194 @@
+# === INIMIGOS EM LOTE ===
+# Modo opcional em que a IA de todos os inimigos é calculada de uma só vez com
+# NumPy (estrutura de arrays), para níveis com centenas de inimigos.
+# As regras são as mesmas de Enemy.update; os objetos Enemy continuam a existir
+# para o desenho, o dano e as colisões com o jogador.
+try:
+    import numpy as np
+except ImportError:  # o modo em lote é opcional
+    np = None
+
+from engine import ANIMATION_SPEED, TILE_SIZE
+
+PATROL_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+class EnemyBatch:
+    """Guarda o estado dos inimigos em arrays e atualiza-os numa passagem vetorizada."""
+    def __init__(self, world, enemies):
+        if np is None:
+            raise RuntimeError("O modo de inimigos em lote precisa do NumPy.")
+        self.world = world
+        self.enemies = list(enemies)
+        self.rng = np.random.default_rng(world.ai_rng.getrandbits(64))
+        tilemap = world.tilemap
+        self.grid = np.frombuffer(bytes(tilemap.solid), dtype=np.uint8).reshape(tilemap.height, tilemap.width) != 0
+        self.directions = np.array(PATROL_DIRECTIONS, dtype=float)
+
+        enemies = self.enemies
+        self.x = np.array([e.x for e in enemies], dtype=float)
+        self.y = np.array([e.y for e in enemies], dtype=float)
+        self.speed = np.array([e.speed for e in enemies], dtype=float)
+        self.vision_sq = np.array([e.vision_range**2 for e in enemies], dtype=float)
+        self.width = np.array([e.sprite.rect.w for e in enemies], dtype=float)
+        self.height = np.array([e.sprite.rect.h for e in enemies], dtype=float)
+        self.patrol_timer = np.array([e.patrol_timer for e in enemies], dtype=float)
+        self.dir_x = np.array([e.direction_vector[0] for e in enemies], dtype=float)
+        self.dir_y = np.array([e.direction_vector[1] for e in enemies], dtype=float)
+        self.facing_left = np.array([e.direction_str == 'left' for e in enemies], dtype=bool)
+        self.anim_timer = np.array([e.anim_timer for e in enemies], dtype=float)
+        self.frame = np.array([e.current_frame for e in enemies], dtype=int)
+        self.frame_count = np.array([len(e.atlas.sequences['walk']) for e in enemies], dtype=int)
+
+        # Cópia em arrays do campo de fluxo do World, refeita quando ele muda.
+        self.field_version = None
+        self.field_x = self.field_y = None
+        # Célula da grelha espacial onde cada inimigo foi visto pela última vez.
+        self.cell_x = self.cell_y = np.full(len(enemies), -1)
+
+    def remove(self, enemy):
+        """Retira um inimigo morto dos arrays."""
+        i = self.enemies.index(enemy)
+        del self.enemies[i]
+        for name in ('x', 'y', 'speed', 'vision_sq', 'width', 'height', 'patrol_timer',
+                     'dir_x', 'dir_y', 'facing_left', 'anim_timer', 'frame', 'frame_count',
+                     'cell_x', 'cell_y'):
+            setattr(self, name, np.delete(getattr(self, name), i))
+
+    def sync_from(self, enemy):
+        """Copia para os arrays a posição de um inimigo movido fora do lote (recuo)."""
+        i = self.enemies.index(enemy)
+        self.x[i], self.y[i] = enemy.x, enemy.y
+
+    def changed_cells(self, cell_size):
+        """Inimigos que mudaram de célula da grelha espacial desde a última chamada."""
+        cell_x = (self.x // cell_size).astype(int)
+        cell_y = (self.y // cell_size).astype(int)
+        changed = np.flatnonzero((cell_x != self.cell_x) | (cell_y != self.cell_y))
+        self.cell_x, self.cell_y = cell_x, cell_y
+        return [self.enemies[i] for i in changed.tolist()]
+
+    def first_contact(self, rect):
+        """Devolve o primeiro inimigo (pela ordem da lista) que toca no retângulo, ou None."""
+        if not self.enemies:
+            return None
+        left, top = self.x - self.width / 2, self.y - self.height / 2
+        touching = ((rect.x < left + self.width) & (rect.y < top + self.height) &
+                    (rect.x + rect.w > left) & (rect.y + rect.h > top))
+        index = int(touching.argmax())
+        return self.enemies[index] if touching[index] else None
+
+    def flow_targets(self, field):
+        """Próximo ponto do campo de fluxo para cada inimigo (NaN = ir direto ao jogador)."""
+        if field.version != self.field_version:
+            self.field_version = field.version
+            self.field_x = np.array(field.target_x, dtype=float)
+            self.field_y = np.array(field.target_y, dtype=float)
+        col = np.floor(self.x / TILE_SIZE).astype(int)
+        row = np.floor(self.y / TILE_SIZE).astype(int)
+        inside = (row >= 0) & (row < field.rows) & (col >= 0) & (col < field.cols)
+        cell = np.where(inside, row * field.cols + col, 0)
+        return (np.where(inside, self.field_x[cell], np.nan),
+                np.where(inside, self.field_y[cell], np.nan))
+
+    def collides_with_walls(self, left, top, width, height):
+        """Versão vetorizada de World.collides_with_walls para vários retângulos."""
+        rows, cols = self.grid.shape
+        first_row = np.maximum(np.floor(top / TILE_SIZE), 0).astype(int)
+        last_row = np.minimum(np.ceil((top + height) / TILE_SIZE), rows).astype(int) - 1
+        first_col = np.maximum(np.floor(left / TILE_SIZE), 0).astype(int)
+        last_col = np.minimum(np.ceil((left + width) / TILE_SIZE), cols).astype(int) - 1
+
+        # Um retângulo ocupa no máximo `span` células em cada eixo.
+        span = int(max(width.max(), height.max()) // TILE_SIZE) + 2
+        hit = np.zeros(len(left), dtype=bool)
+        for i in range(span):
+            r = first_row + i
+            row_ok = r <= last_row
+            r = np.minimum(r, rows - 1)
+            for j in range(span):
+                c = first_col + j
+                ok = row_ok & (c <= last_col)
+                hit |= ok & self.grid[r, np.minimum(c, cols - 1)]
+        return hit
+
+    def update(self, dt):
+        """Implementa a IA de todos os inimigos, tal como Enemy.update."""
+        if not self.enemies:
+            return
+        player = self.world.player
+        px, py = player.sprite.x, player.sprite.y
+        x, y = self.x, self.y
+
+        # Visão
+        dx_player, dy_player = px - x, py - y
+        dist_sq = dx_player**2 + dy_player**2
+        chasing = dist_sq < self.vision_sq
+        line_of_sight = self.world.line_of_sight
+        if line_of_sight is not None:
+            # Só os poucos inimigos ao alcance precisam da linha de visão.
+            for i in np.flatnonzero(chasing).tolist():
+                chasing[i] = line_of_sight.visible(x[i], y[i], px, py)
+        patrolling = ~chasing
+
+        # Patrulha: temporizadores e novas direções aleatórias
+        self.patrol_timer[patrolling] -= dt
+        reroll = patrolling & (self.patrol_timer <= 0)
+        count = int(reroll.sum())
+        if count:
+            self.patrol_timer[reroll] = self.rng.uniform(2, 5, count)
+            picks = self.directions[self.rng.integers(0, len(self.directions), count)]
+            self.dir_x[reroll] = picks[:, 0]
+            self.dir_y[reroll] = picks[:, 1]
+
+        # Perseguição: vetor normalizado em direção ao jogador, ou ao próximo
+        # tile do campo de fluxo quando o World o usa
+        chase_x, chase_y = dx_player, dy_player
+        if self.world.flow_field is not None:
+            target_x, target_y = self.flow_targets(self.world.flow_field)
+            chase_x = np.where(np.isnan(target_x), dx_player, target_x - x)
+            chase_y = np.where(np.isnan(target_y), dy_player, target_y - y)
+        norm = np.sqrt(chase_x**2 + chase_y**2)
+        safe_norm = np.where(norm > 0, norm, 1)
+        self.dir_x = np.where(chasing, np.where(norm > 0, chase_x / safe_norm, 0), self.dir_x)
+        self.dir_y = np.where(chasing, np.where(norm > 0, chase_y / safe_norm, 0), self.dir_y)
+
+        dx, dy = self.dir_x * self.speed, self.dir_y * self.speed
+        self.facing_left = np.where(dx < 0, True, np.where(dx > 0, False, self.facing_left))
+
+        # Movimento com colisão, eixo a eixo. Como em Enemy.move, o teste do
+        # eixo Y usa o retângulo já deslocado em X, mesmo que X tenha sido recusado.
+        half_w, half_h = self.width / 2, self.height / 2
+        tried_x = x + dx
+        blocked = self.collides_with_walls(tried_x - half_w, y - half_h, self.width, self.height)
+        new_x = np.where(blocked, x, tried_x)
+        tried_y = y + dy
+        blocked = self.collides_with_walls(tried_x - half_w, tried_y - half_h, self.width, self.height)
+        self.x, self.y = new_x, np.where(blocked, y, tried_y)
+
+        # Animação
+        self.anim_timer += dt
+        advance = self.anim_timer > ANIMATION_SPEED
+        self.anim_timer[advance] = 0
+        self.frame[advance] = (self.frame[advance] + 1) % self.frame_count[advance]
+
+        self.write_back(chasing, advance)
+
+    def write_back(self, chasing, advance):
+        """Copia o estado dos arrays para os objetos Enemy usados fora do lote."""
+        for enemy, ex, ey, is_chasing, left, timer, anim_timer, frame, dir_x, dir_y in zip(
+                self.enemies, self.x.tolist(), self.y.tolist(), chasing.tolist(),
+                self.facing_left.tolist(), self.patrol_timer.tolist(), self.anim_timer.tolist(),
+                self.frame.tolist(), self.dir_x.tolist(), self.dir_y.tolist()):
+            enemy.x, enemy.y = ex, ey
+            enemy.sprite.pos = ex, ey
+            enemy.state = 'chasing' if is_chasing else 'patrolling'
+            enemy.direction_str = 'left' if left else 'right'
+            enemy.patrol_timer = timer
+            enemy.anim_timer = anim_timer
+            enemy.current_frame = frame
+            enemy.direction_vector = (dir_x, dir_y)
+
+        for i in np.flatnonzero(advance).tolist():
+            enemy = self.enemies[i]
+            sequences = enemy.atlas.left_sequences if enemy.direction_str == 'left' else enemy.atlas.sequences
+            enemy.sprite.frame = sequences['walk'][enemy.current_frame]
@@ -0,0 +1,976 @@
+# === MOTOR DE SIMULAÇÃO ===
+# Toda a lógica do jogo, independente da janela e dos globais do pgzrun.
+# O mesmo World é usado pelo jogo (the_next_level.py) e pelo modo headless.
+import math
+import os
+import random
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from pgzero.rect import Rect, ZRect
+
+from profiler import NullProfiler
+from spatial_hash import SpatialHash
+from tilemap import DOOR, TileMap
+
+# === SESSÃO 1: CONSTANTES ===
+WIDTH = 800
+HEIGHT = 600
+
+TILE_SIZE = 16
+# Tamanho por omissão do mapa, em tiles: cabe inteiro na janela. Mapas maiores
+# (World(map_size=...)) são vistos através de uma câmara que segue o jogador.
+MAP_WIDTH = WIDTH // TILE_SIZE
+MAP_HEIGHT = HEIGHT // TILE_SIZE
+# As salas têm até MAX_ROOM_WIDTH x MAX_ROOM_HEIGHT tiles e uma parede à
+# volta; num mapa menor a geração não tem onde as pôr.
+MAX_ROOM_WIDTH, MAX_ROOM_HEIGHT = 12, 10
+MIN_MAP_WIDTH, MIN_MAP_HEIGHT = MAX_ROOM_WIDTH + 2, MAX_ROOM_HEIGHT + 2
+MAX_LEVELS = 5
+
+# Passo fixo da lógica: as velocidades (ex.: Player.speed) são píxeis por passo.
+LOGIC_RATE = 60
+LOGIC_DT = 1 / LOGIC_RATE
+# Máximo de passos recuperados num frame; acima disso o jogo abranda em vez de
+# gastar cada vez mais tempo a recuperar.
+MAX_STEPS_PER_FRAME = 5
+
+# Nível de detalhe da IA (modo não vetorizado). Os inimigos visíveis pensam a
+# cada passo; fora do ecrã, só a cada AI_REDUCED_INTERVAL passos e sem animar;
+# a mais de AI_SLEEP_RADIUS px do jogador dormem até ele se aproximar.
+AI_REDUCED_INTERVAL = 4
+AI_SLEEP_RADIUS = 2 * WIDTH
+# Folga à volta do ecrã para um inimigo contar como visível.
+AI_VIEW_MARGIN = 2 * TILE_SIZE
+
+# Constantes de balanceamento da jogabilidade (ver balance.py). Os atributos
+# de cada tipo de inimigo estão na respetiva classe.
+MAX_LIVES = 5
+ANIMATION_SPEED = 0.15
+ATTACK_COOLDOWN = 0.4
+# O nível N tem N + EXTRA_ENEMIES inimigos, sorteados com estes pesos para
+# Enemy, Ghost e Cyclops; o peso do Cyclops cresce um por nível.
+EXTRA_ENEMIES = 2
+SPAWN_WEIGHTS = (10, 5, 2)
+
+# Grelha espacial das entidades: células de 2x2 tiles. Nenhum sprite tem mais
+# de um tile de meia largura (o maior, o ataque do jogador, tem 22 px).
+SPATIAL_CELL_SIZE = 2 * TILE_SIZE
+ENTITY_REACH = TILE_SIZE
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+# === SESSÃO 2: SPRITES, ENTRADA E ÁUDIO ===
+
+_image_sizes = {}
+
+def image_size(name):
+    """Lê as dimensões de uma imagem do cabeçalho PNG, sem precisar de um ecrã."""
+    if name not in _image_sizes:
+        with open(os.path.join(IMAGES_DIR, name + '.png'), 'rb') as f:
+            header = f.read(24)
+        _image_sizes[name] = struct.unpack('>II', header[16:24])
+    return _image_sizes[name]
+
+class Sprite:
+    """Imagem e retângulo de colisão de uma entidade, centrados na sua posição."""
+    __slots__ = ('_image', 'rect')
+    atlas = None
+
+    def __init__(self, image, pos):
+        self._image = image
+        self.rect = ZRect((0, 0), image_size(image))
+        self.pos = pos
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        # Tal como no Actor, a troca de imagem mantém o centro e ajusta o tamanho.
+        pos = self.pos
+        self._image = image
+        self.rect.size = image_size(image)
+        self.pos = pos
+
+    @property
+    def x(self):
+        return self.rect.x + self.rect.w / 2
+
+    @x.setter
+    def x(self, x):
+        self.rect.x = x - self.rect.w / 2
+
+    @property
+    def y(self):
+        return self.rect.y + self.rect.h / 2
+
+    @y.setter
+    def y(self, y):
+        self.rect.y = y - self.rect.h / 2
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
+
+class AnimationAtlas:
+    """Frames de animação de uma personagem, indexados por número.
+
+    Os frames virados para a esquerda ficam no índice `i + mirror_offset` e
+    são os da direita espelhados ao carregar, exceto os que têm desenho
+    próprio em `left_names` (nome do frame da direita -> nome do da esquerda).
+    """
+    def __init__(self, sequences, left_names=None):
+        self.names = []
+        self.sequences = {}
+        for state, names in sequences.items():
+            for name in names:
+                if name not in self.names:
+                    self.names.append(name)
+            self.sequences[state] = [self.names.index(name) for name in names]
+        self.mirror_offset = len(self.names)
+        self.left_sequences = {state: [i + self.mirror_offset for i in frames]
+                               for state, frames in self.sequences.items()}
+        # Imagem de cada frame da esquerda, ou None para espelhar o da direita
+        # (o espelho tem o mesmo tamanho do original).
+        left_names = left_names or {}
+        self.left_names = [left_names.get(name) for name in self.names]
+        self.sizes = ([image_size(name) for name in self.names] +
+                      [image_size(left or name) for left, name in zip(self.left_names, self.names)])
+
+class AnimatedSprite(Sprite):
+    """Sprite desenhado a partir de um AnimationAtlas; trocar de frame é só mudar um índice."""
+    __slots__ = ('atlas', '_frame')
+
+    def __init__(self, atlas, frame, pos):
+        self.atlas = atlas
+        self._frame = frame
+        self.rect = ZRect((0, 0), atlas.sizes[frame])
+        self.pos = pos
+
+    @property
+    def frame(self):
+        return self._frame
+
+    @frame.setter
+    def frame(self, frame):
+        self._frame = frame
+        size = self.atlas.sizes[frame]
+        if size != self.rect.size:
+            pos = self.pos
+            self.rect.size = size
+            self.pos = pos
+
+class InputState:
+    """Fonte de entrada com o estado das teclas usadas pelo jogo.
+
+    O `keyboard` do pgzero tem a mesma interface; no modo headless as teclas
+    são definidas diretamente por um script ou bot.
+    """
+    __slots__ = ('a', 'd', 'w', 's', 'space')
+
+    def __init__(self):
+        self.a = self.d = self.w = self.s = self.space = False
+
+class NullAudio:
+    """Áudio sem efeito, usado quando nada é reproduzido."""
+    def play_sound(self, name):
+        pass
+
+    def play_music(self, name):
+        pass
+
+    def stop_music(self):
+        pass
+
+# === SESSÃO 3: CLASSES DOS PERSONAGENS ===
+
+class Player:
+    """Representa o herói controlado pelo utilizador."""
+    atlas = AnimationAtlas({
+        'idle': ["player_idle_1", "player_idle_2"],
+        'walk': ["player_walk_1", "player_walk_2"],
+        'attack': ["player_attack_1", "player_attack_2"]
+    }, left_names={
+        # O idle virado para a esquerda tem dois frames desenhados à mão.
+        "player_idle_1": "player_idle_left_1",
+        "player_idle_2": "player_idle_left_2",
+    })
+    __slots__ = ('world', 'x', 'y', 'speed', 'state', 'direction', 'current_frame', 'anim_timer', 'sprite',
+                 'invincible_timer', 'attack_cooldown_timer', 'attack_anim_timer')
+
+    def __init__(self, world, x, y):
+        self.world = world
+        self.x, self.y = x, y
+        self.speed = 2
+        self.state = 'idle'
+        self.direction = 'down'
+
+        self.current_frame = 0
+        self.anim_timer = 0
+        self.sprite = AnimatedSprite(self.atlas, self.atlas.sequences['idle'][0], (self.x, self.y))
+
+        self.invincible_timer = 0
+        self.attack_cooldown_timer = 0
+        self.attack_anim_timer = 0
+
+    @property
+    def visible(self):
+        """Falso nos frames em que o jogador pisca por estar invencível."""
+        return not (self.invincible_timer > 0 and int(self.invincible_timer * 10) % 2 == 0)
+
+    def move(self, dx, dy):
+        """Processa o movimento e a colisão com as paredes."""
+        if self.state == 'attack':
+            return
+
+        if dx > 0:
+            self.direction = 'right'
+        elif dx < 0:
+            self.direction = 'left'
+        elif dy < 0 and self.direction not in ['left', 'right']:
+            self.direction = 'up'
+        elif dy > 0 and self.direction not in ['left', 'right']:
+            self.direction = 'down'
+
+        # Verificação de colisão no eixo X
+        self.x += dx
+        self.sprite.x = self.x
+        if self.world.collides_with_walls(self.sprite.rect):
+            self.x -= dx
+
+        # Verificação de colisão no eixo Y
+        self.y += dy
+        self.sprite.y = self.y
+        if self.world.collides_with_walls(self.sprite.rect):
+            self.y -= dy
+
+        self.sprite.pos = self.x, self.y
+
+    def attack(self):
+        """Inicia a ação de ataque."""
+        if self.attack_cooldown_timer <= 0:
+            self.state = 'attack'
+            self.current_frame = 0
+            self.attack_cooldown_timer = ATTACK_COOLDOWN
+            self.attack_anim_timer = ANIMATION_SPEED * 2
+            self.world.audio.play_sound('hit')
+
+            # Criar hitbox do ataque
+            px, py = int(self.sprite.rect.centerx), int(self.sprite.rect.centery)
+            if self.direction == 'up':
+                topleft_x, topleft_y = px - TILE_SIZE // 2, py - TILE_SIZE - TILE_SIZE // 2
+            elif self.direction == 'down':
+                topleft_x, topleft_y = px - TILE_SIZE // 2, py + TILE_SIZE // 2
+            elif self.direction == 'left':
+                topleft_x, topleft_y = px - TILE_SIZE - TILE_SIZE // 2, py - TILE_SIZE // 2
+            elif self.direction == 'right':
+                topleft_x, topleft_y = px + TILE_SIZE // 2, py - TILE_SIZE // 2
+
+            self.world.attack_hitbox = Rect((topleft_x, topleft_y), (TILE_SIZE, TILE_SIZE))
+
+    def take_damage(self, enemy):
+        """Processa a perda de vida e o efeito de recuo."""
+        if self.invincible_timer > 0:
+            return
+
+        self.world.player_lives -= 1
+        self.invincible_timer = 1.0
+
+        # Calcular recuo
+        dx, dy = self.x - enemy.x, self.y - enemy.y
+        norm_sq = dx**2 + dy**2
+        if norm_sq > 0:
+            norm = norm_sq**0.5
+            knock_dx, knock_dy = (dx / norm) * 4, (dy / norm) * 4
+            self.move(knock_dx, knock_dy)
+
+    def update(self, dt):
+        """Lógica principal do jogador."""
+        if self.invincible_timer > 0:
+            self.invincible_timer -= dt
+        if self.attack_cooldown_timer > 0:
+            self.attack_cooldown_timer -= dt
+
+        if self.state == 'attack':
+            self.attack_anim_timer -= dt
+            if self.attack_anim_timer <= 0:
+                self.state = 'idle'
+            self.animate(dt)
+            return
+
+        keyboard = self.world.input
+        if keyboard.space:
+            self.attack()
+            self.animate(dt)
+            return
+
+        # Movimento com WASD
+        dx, dy = 0, 0
+        if keyboard.a:
+            dx = -self.speed
+        elif keyboard.d:
+            dx = self.speed
+        elif keyboard.w:
+            dy = -self.speed
+        elif keyboard.s:
+            dy = self.speed
+
+        self.state = 'walk' if (dx != 0 or dy != 0) else 'idle'
+        if self.state == 'walk':
+            self.move(dx, dy)
+
+        self.animate(dt)
+
+    def animate(self, dt):
+        """Gere a troca de frames das animações."""
+        self.anim_timer += dt
+        if self.anim_timer < ANIMATION_SPEED:
+            return
+        self.anim_timer = 0
+
+        sequences = self.atlas.left_sequences if self.direction == 'left' else self.atlas.sequences
+        current_sequence = sequences.get(self.state, sequences['idle'])
+        self.current_frame = (self.current_frame + 1) % len(current_sequence)
+        self.sprite.frame = current_sequence[self.current_frame]
+
+class Enemy:
+    """Classe base para todos os inimigos.
+
+    Cada tipo define na classe a velocidade, a vida inicial (`max_health`) e o
+    alcance de visão; só o estado que muda fica em cada instância.
+    """
+    atlas = AnimationAtlas({'walk': ["enemy_walk_1", "enemy_walk_2"]})
+    speed = 1
+    max_health = 1
+    vision_range = 150
+    __slots__ = ('world', 'x', 'y', 'health', 'state', 'direction_str', 'current_frame', 'anim_timer', 'sprite',
+                 'patrol_timer', 'direction_vector')
+
+    def __init__(self, world, x, y):
+        self.reset(world, x, y)
+        self.sprite = AnimatedSprite(self.atlas, self.atlas.sequences['walk'][0], (x, y))
+
+    def respawn(self, world, x, y):
+        """Reaproveita um inimigo de outro nível como acabado de nascer em (x, y)."""
+        self.reset(world, x, y)
+        sprite = self.sprite
+        sprite.frame = self.atlas.sequences['walk'][0]
+        sprite.pos = x, y
+
+    def reset(self, world, x, y):
+        self.world = world
+        self.x, self.y = x, y
+        self.health = self.max_health
+        self.state = 'patrolling'
+        self.direction_str = 'right'
+
+        self.current_frame, self.anim_timer = 0, 0
+
+        self.patrol_timer = world.ai_rng.uniform(1, 3)
+        self.direction_vector = (0, 0)
+
+    def take_damage(self, attacker):
+        """Reduz a vida do inimigo e aplica recuo."""
+        self.health -= 1
+        dx, dy = self.x - attacker.x, self.y - attacker.y
+        norm_sq = dx**2 + dy**2
+        if norm_sq > 0:
+            norm = norm_sq**0.5
+            knock_dx, knock_dy = (dx / norm) * 8, (dy / norm) * 8
+            self.move(knock_dx, knock_dy)
+
+    def move(self, dx, dy):
+        """Processa o movimento e a colisão com as paredes."""
+        self.x += dx
+        self.sprite.x = self.x
+        if self.world.collides_with_walls(self.sprite.rect):
+            self.x -= dx
+
+        self.y += dy
+        self.sprite.y = self.y
+        if self.world.collides_with_walls(self.sprite.rect):
+            self.y -= dy
+        self.sprite.pos = self.x, self.y
+
+    def update(self, dt, steps=1, animate=True):
+        """Implementa a IA do inimigo.
+
+        Com `steps` > 1 avança vários passos de uma vez (`dt` já os inclui);
+        usado para os inimigos fora do ecrã (ver World.update).
+        """
+        player = self.world.player
+        dx_player, dy_player = self.x - player.sprite.x, self.y - player.sprite.y
+        dist_sq_to_player = dx_player**2 + dy_player**2
+
+        sees_player = dist_sq_to_player < self.vision_range**2
+        line_of_sight = self.world.line_of_sight
+        if sees_player and line_of_sight is not None:
+            sees_player = line_of_sight.visible(self.x, self.y, player.sprite.x, player.sprite.y)
+        self.state = 'chasing' if sees_player else 'patrolling'
+
+        if self.state == 'patrolling':
+            self.patrol_timer -= dt
+            if self.patrol_timer <= 0:
+                rng = self.world.ai_rng
+                self.patrol_timer = rng.uniform(2, 5)
+                self.direction_vector = rng.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+        else:  # Chasing
+            # Com campo de fluxo, segue o próximo tile do caminho em vez da linha reta.
+            flow_field = self.world.flow_field
+            target = flow_field.next_step(self.x, self.y) if flow_field is not None else None
+            if target is None:
+                target = player.sprite.x, player.sprite.y
+            dx, dy = target[0] - self.x, target[1] - self.y
+            norm_sq = dx**2 + dy**2
+            if norm_sq > 0:
+                norm = norm_sq**0.5
+                self.direction_vector = (dx / norm, dy / norm)
+            else:
+                self.direction_vector = (0, 0)
+
+        dx, dy = self.direction_vector[0] * self.speed * steps, self.direction_vector[1] * self.speed * steps
+        if dx > 0:
+            self.direction_str = 'right'
+        elif dx < 0:
+            self.direction_str = 'left'
+
+        self.move(dx, dy)
+        if animate:
+            self.animate(dt)
+
+    def animate(self, dt):
+        """Gere a troca de frames da animação."""
+        self.anim_timer += dt
+        if self.anim_timer > ANIMATION_SPEED:
+            self.anim_timer = 0
+            sequences = self.atlas.left_sequences if self.direction_str == 'left' else self.atlas.sequences
+            anim_sequence = sequences['walk']
+            self.current_frame = (self.current_frame + 1) % len(anim_sequence)
+            self.sprite.frame = anim_sequence[self.current_frame]
+
+class Ghost(Enemy):
+    atlas = AnimationAtlas({'walk': ["ghost_walk_1", "ghost_walk_2"]})
+    speed = 1.5
+    max_health = 1
+    __slots__ = ()
+
+class Cyclops(Enemy):
+    atlas = AnimationAtlas({'walk': ["cyclops_walk_1", "cyclops_walk_2"]})
+    speed = 0.5
+    max_health = 3
+    __slots__ = ()
+
+class EntityPool:
+    """Inimigos e poções de níveis anteriores, guardados para serem reaproveitados.
+
+    Um nível novo tira daqui as suas entidades em vez de as construir; as que
+    morrem, são apanhadas ou sobram de um nível voltam para cá. Há uma lista
+    por tipo de inimigo e por imagem de sprite.
+    """
+    __slots__ = ('free',)
+
+    def __init__(self):
+        self.free = {}
+
+    def enemy(self, enemy_type, world, x, y):
+        """Um inimigo de `enemy_type` acabado de nascer em (x, y)."""
+        free = self.free.get(enemy_type)
+        if not free:
+            return enemy_type(world, x, y)
+        enemy = free.pop()
+        enemy.respawn(world, x, y)
+        return enemy
+
+    def sprite(self, image, pos):
+        """Um Sprite com a imagem `image` em `pos`."""
+        free = self.free.get(image)
+        if not free:
+            return Sprite(image, pos)
+        sprite = free.pop()
+        sprite.pos = pos
+        return sprite
+
+    def release(self, entity):
+        """Devolve uma entidade que deixou de estar em jogo."""
+        key = entity.image if type(entity) is Sprite else type(entity)
+        self.free.setdefault(key, []).append(entity)
+
+# === SESSÃO 4: GERAÇÃO DE NÍVEIS ===
+
+# Caracteres do mapa, como bytes (ver TILE_CODES em tilemap.py).
+FLOOR_CHAR, WALL_CHAR, DECORATED_WALL_CHAR, DOOR_CHAR = b'.', b'#', b'X', b'D'
+# Cada parede passa a decorativa com esta probabilidade, sorteada com um byte
+# aleatório por célula.
+DECORATION_CHANCE = 0.2
+_IS_WALL = bytes(1 if i == WALL_CHAR[0] else 0 for i in range(256))
+_IS_DECORATED = bytes(1 if i < round(DECORATION_CHANCE * 256) else 0 for i in range(256))
+
+def carve_map(rng, width, height):
+    """Escava as salas e os corredores; devolve os caracteres do mapa (linha a linha) e as salas."""
+    grid = bytearray(WALL_CHAR * (width * height))
+    rooms = []
+
+    # Mapas maiores tentam mais salas, na proporção da área.
+    scale = max(1, (width * height) // (MAP_WIDTH * MAP_HEIGHT))
+    for _ in range(rng.randint(5, 8) * scale):
+        w, h = rng.randint(6, MAX_ROOM_WIDTH), rng.randint(5, MAX_ROOM_HEIGHT)
+        x, y = rng.randint(1, width - w - 1), rng.randint(1, height - h - 1)
+        new_room = Rect((x, y), (w, h))
+
+        if new_room.collidelist(rooms) == -1:
+            for row in range(y, y + h):
+                grid[row * width + x:row * width + x + w] = FLOOR_CHAR * w
+            rooms.append(new_room)
+
+    # Conectar salas com corredores de três tiles de largura: um troço
+    # horizontal na linha da primeira sala e um vertical na coluna da segunda.
+    for room, next_room in zip(rooms, rooms[1:]):
+        (cx1, cy1), (cx2, cy2) = room.center, next_room.center
+        left, right = min(cx1, cx2), max(cx1, cx2)
+        for row in range(max(cy1 - 1, 0), min(cy1 + 2, height)):
+            grid[row * width + left:row * width + right + 1] = FLOOR_CHAR * (right - left + 1)
+        top, bottom = min(cy1, cy2), max(cy1, cy2)
+        for col in range(max(cx2 - 1, 0), min(cx2 + 2, width)):
+            grid[top * width + col:bottom * width + col + 1:width] = FLOOR_CHAR * (bottom - top + 1)
+    return grid, rooms
+
+def generate_maps(rngs, width=MAP_WIDTH, height=MAP_HEIGHT):
+    """Gera um mapa por cada gerador de `rngs`; devolve os caracteres de cada um, linha a linha.
+
+    As paredes decorativas de todos os mapas são escolhidas de uma só vez.
+    Cada mapa sai igual ao de generate_random_map com o mesmo gerador.
+    """
+    size = width * height
+    grids, noise, doors = bytearray(), bytearray(), []
+    for index, rng in enumerate(rngs):
+        grid, rooms = carve_map(rng, width, height)
+        grids += grid
+        noise += rng.randbytes(size)
+        if rooms:
+            # Porta na última sala
+            col, row = rooms[-1].center
+            doors.append(index * size + row * width + col)
+
+    # Paredes decorativas: as máscaras têm um byte 0/1 por célula; como
+    # inteiros, o E e a soma tratam todas as células sem transportes entre bytes.
+    walls = int.from_bytes(grids.translate(_IS_WALL), 'big')
+    decorated = int.from_bytes(noise.translate(_IS_DECORATED), 'big')
+    step = DECORATED_WALL_CHAR[0] - WALL_CHAR[0]
+    grids = bytearray((int.from_bytes(grids, 'big') + (walls & decorated) * step).to_bytes(len(grids), 'big'))
+    for door in doors:
+        grids[door] = DOOR_CHAR[0]
+    return [grids[index * size:(index + 1) * size] for index in range(len(rngs))]
+
+def map_rows(chars, width):
+    """Linhas de texto do mapa (o formato de World.level_map)."""
+    text = chars.decode('ascii')
+    return [text[start:start + width] for start in range(0, len(text), width)]
+
+def generate_random_map(rng=random, width=MAP_WIDTH, height=MAP_HEIGHT):
+    """Gera um mapa proceduralmente."""
+    return map_rows(generate_maps([rng], width, height)[0], width)
+
+def find_valid_spawn_points(level_map):
+    """Encontra pontos válidos para spawn de entidades."""
+    points = []
+    for r, row in enumerate(level_map):
+        for c, char in enumerate(row):
+            if char == '.':
+                points.append((c * TILE_SIZE + TILE_SIZE/2, r * TILE_SIZE + TILE_SIZE/2))
+    return points
+
+def sample_cells(rng, chars, count, char=FLOOR_CHAR):
+    """Sorteia até `count` células diferentes com o caractere `char`, sem reposição.
+
+    Sorteia índices ao acaso e rejeita os que não servem, sem construir a
+    lista das células livres: cada ponto custa em média tantas tentativas
+    quantas células há por cada célula livre (cerca de 4 nos mapas gerados).
+    """
+    count = min(count, chars.count(char))
+    code = char[0]
+    chosen = []
+    taken = set()
+    while len(chosen) < count:
+        index = rng.randrange(len(chars))
+        if chars[index] == code and index not in taken:
+            taken.add(index)
+            chosen.append(index)
+    return chosen
+
+class LevelPlan:
+    """Tudo o que é preciso para montar um nível, calculado sem tocar no World."""
+    def __init__(self, level, level_map, tilemap, player_pos, enemy_spawns, potion_positions):
+        self.level = level
+        self.level_map = level_map
+        self.tilemap = tilemap
+        self.player_pos = player_pos
+        self.enemy_spawns = enemy_spawns  # lista de (classe do inimigo, posição)
+        self.potion_positions = potion_positions
+
+def plan_levels(requests, map_size=(MAP_WIDTH, MAP_HEIGHT)):
+    """Planeia vários níveis de uma vez, um por cada par (nível, gerador) de `requests`.
+
+    Cada plano sai igual ao de plan_level com o mesmo nível e gerador.
+    """
+    width, height = map_size
+    maps = generate_maps([rng for _, rng in requests], width, height)
+    plans = []
+    for (level, rng), chars in zip(requests, maps):
+        # Jogador, inimigos e poção em células livres diferentes.
+        enemy_count = level + EXTRA_ENEMIES
+        cells = [(index % width * TILE_SIZE + TILE_SIZE/2, index // width * TILE_SIZE + TILE_SIZE/2)
+                 for index in sample_cells(rng, chars, enemy_count + 2)]
+        player_pos, enemy_cells, potion_positions = cells[0], cells[1:enemy_count + 1], cells[enemy_count + 1:]
+        weights = [SPAWN_WEIGHTS[0], SPAWN_WEIGHTS[1], SPAWN_WEIGHTS[2] + level]
+        enemy_types = rng.choices([Enemy, Ghost, Cyclops], weights=weights, k=len(enemy_cells))
+        plans.append(LevelPlan(level, map_rows(chars, width), TileMap.from_chars(width, height, chars),
+                               player_pos, list(zip(enemy_types, enemy_cells)), potion_positions))
+    return plans
+
+def plan_level(level, rng=random, map_size=(MAP_WIDTH, MAP_HEIGHT)):
+    """Gera o mapa e escolhe os pontos de spawn do nível `level`."""
+    return plan_levels([(level, rng)], map_size)[0]
+
+# Um único trabalhador partilhado prepara os níveis seguintes em segundo plano.
+_level_executor = None
+
+def level_executor():
+    """Devolve o executor usado para pré-gerar níveis, criando-o na primeira utilização."""
+    global _level_executor
+    if _level_executor is None:
+        _level_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-pregen')
+    return _level_executor
+
+# === SESSÃO 5: MUNDO ===
+
+def view_origin(x, y, tilemap, width=WIDTH, height=HEIGHT):
+    """Canto da janela de `width` x `height` centrada em (x, y), sem sair dos limites do mapa."""
+    # Posição inteira, para os tiles não tremerem entre frames.
+    map_width, map_height = tilemap.width * TILE_SIZE, tilemap.height * TILE_SIZE
+    return (int(min(max(x - width / 2, 0), max(map_width - width, 0))),
+            int(min(max(y - height / 2, 0), max(map_height - height, 0))))
+
+class World:
+    """Guarda todo o estado de uma partida e avança a sua lógica.
+
+    `input_source` é qualquer objeto com os atributos de `InputState` (o
+    `keyboard` do pgzero serve) e `audio` qualquer objeto com a interface de
+    `NullAudio`. Nada aqui desenha ou abre uma janela.
+
+    Com `batched_enemies`, a IA dos inimigos corre em lote (ver enemy_batch.py);
+    com `use_flow_field`, os inimigos perseguem o jogador pelo campo de fluxo
+    de pathfinding.py em vez de em linha reta; com `use_line_of_sight`, só
+    veem o jogador se não houver paredes no meio (ver sight.py), e com
+    `precompute_visibility` essa visibilidade é tabelada ao carregar cada
+    nível; com `pregenerate_levels`, o nível seguinte é preparado numa
+    thread enquanto o atual é jogado.
+    `map_size` é o tamanho dos mapas gerados, em tiles (largura, altura), no
+    mínimo MIN_MAP_WIDTH x MIN_MAP_HEIGHT.
+    `profiler` (ver profiler.py) recebe o tempo de cada fase de update().
+
+    Toda a aleatoriedade sai de `seed` (escolhida ao acaso se for None), por
+    dois fluxos separados: um para gerar os níveis e outro para a IA. Com a
+    mesma semente, as mesmas opções e as mesmas teclas, a partida repete-se
+    (ver replay.py). O estado completo pode ser gravado e retomado a meio
+    (ver savegame.py); com `autosave`, é gravado a cada novo nível.
+
+    `update(dt)` dá um passo de lógica; o jogo usa `advance(frame_dt)`, que dá
+    tantos passos fixos de LOGIC_DT quantos couberem no tempo real decorrido.
+    """
+    def __init__(self, input_source=None, audio=None, batched_enemies=False, use_flow_field=False,
+                 use_line_of_sight=False, precompute_visibility=False, pregenerate_levels=False,
+                 profiler=None, seed=None, map_size=(MAP_WIDTH, MAP_HEIGHT)):
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.level_rng = random.Random(f"{self.seed}:levels")
+        self.ai_rng = random.Random(f"{self.seed}:ai")
+        self.level_seed = None  # (nível, semente) do último nível sorteado
+        self.input = input_source if input_source is not None else InputState()
+        self.audio = audio if audio is not None else NullAudio()
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.map_size = tuple(map_size)
+        if self.map_size[0] < MIN_MAP_WIDTH or self.map_size[1] < MIN_MAP_HEIGHT:
+            raise ValueError(f"Mapa de {self.map_size[0]}x{self.map_size[1]} tiles é pequeno demais; "
+                             f"o mínimo é {MIN_MAP_WIDTH}x{MIN_MAP_HEIGHT}.")
+        self.batched_enemies = batched_enemies
+        self.use_flow_field = use_flow_field
+        self.use_line_of_sight = use_line_of_sight
+        self.precompute_visibility = precompute_visibility
+        self.pregenerate_levels = pregenerate_levels
+        self.prepared_level = None
+        # Gravador das teclas de cada passo (ver replay.py), se houver.
+        self.recorder = None
+        # Gravação automática a cada nível (ver savegame.py), se houver.
+        self.autosave = None
+
+        self.state = 'playing'
+        self.current_level = 0
+        self.player_lives = MAX_LIVES
+        self.is_door_open = False
+
+        self.level_map = []
+        self.tilemap = TileMap(0, 0, b'')
+        self.flow_field = None
+        self.line_of_sight = None
+        self.player = None
+        self.enemies = []
+        self.enemy_batch = None
+        self.potions = []
+        # Inimigos e poções de níveis anteriores, reaproveitados pelos seguintes.
+        self.pool = EntityPool()
+        # Broad-phase das colisões com o jogador e com o ataque (ver spatial_hash.py).
+        self.enemy_grid = SpatialHash(SPATIAL_CELL_SIZE, ENTITY_REACH)
+        self.potion_grid = SpatialHash(SPATIAL_CELL_SIZE, ENTITY_REACH)
+        self.door = None
+        self.attack_hitbox = None
+
+        # Passo fixo: tempo ainda por simular, fração do passo seguinte já
+        # decorrida (0 a 1) e posições antes do último passo, para interpolar.
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.previous_positions = {}
+        # Passos de lógica dados; escalona os inimigos fora do ecrã.
+        self.step_count = 0
+
+    def start(self, level=1):
+        """Começa uma partida nova, com as vidas cheias, a partir do nível `level`."""
+        self.state = 'playing'
+        self.current_level = level - 1
+        self.player_lives = MAX_LIVES
+        self.next_level()
+
+    def setup_level(self, level_map, tilemap=None):
+        """Constrói a geometria do nível."""
+        self.level_map = level_map
+        self.tilemap = tilemap if tilemap is not None else TileMap.from_rows(level_map)
+        self.door = None
+        if self.use_flow_field:
+            from pathfinding import FlowField
+            self.flow_field = FlowField(self.tilemap)
+        if self.use_line_of_sight:
+            from sight import LineOfSight
+            self.line_of_sight = LineOfSight(self.tilemap, precompute=self.precompute_visibility)
+
+        for col_index, row_index in self.tilemap.cells(DOOR)[:1]:
+            x, y = col_index * TILE_SIZE, row_index * TILE_SIZE
+            self.door = Sprite("closed_door", (x + TILE_SIZE / 2, y + TILE_SIZE / 2))
+
+    def collides_with_walls(self, rect):
+        """Verifica a colisão apenas com as células da grelha que o retângulo ocupa."""
+        tilemap = self.tilemap
+        width, solid = tilemap.width, tilemap.solid
+        first_row = max(int(rect.top // TILE_SIZE), 0)
+        last_row = min(math.ceil(rect.bottom / TILE_SIZE), tilemap.height) - 1
+        first_col = max(int(rect.left // TILE_SIZE), 0)
+        last_col = min(math.ceil(rect.right / TILE_SIZE), width) - 1
+        if first_col > last_col:
+            return False
+        for r in range(first_row, last_row + 1):
+            start = r * width
+            if solid.find(1, start + first_col, start + last_col + 1) >= 0:
+                return True
+        return False
+
+    def set_enemies(self, enemies):
+        """Define os inimigos do nível e, no modo em lote, reconstrói os arrays."""
+        self.enemies = enemies
+        self.enemy_grid.clear()
+        for enemy in enemies:
+            self.enemy_grid.insert(enemy, enemy.x, enemy.y)
+        if self.batched_enemies:
+            from enemy_batch import EnemyBatch
+            self.enemy_batch = EnemyBatch(self, enemies)
+
+    def set_potions(self, potions):
+        """Define as poções do nível."""
+        self.potions = potions
+        self.potion_grid.clear()
+        for potion in potions:
+            self.potion_grid.insert(potion, potion.x, potion.y)
+
+    def open_the_door(self):
+        """Abre a porta quando todos os inimigos são derrotados."""
+        if self.door:
+            self.door.image = "door"
+            self.is_door_open = True
+
+    def next_level(self):
+        """Prepara o próximo nível."""
+        self.current_level += 1
+        if self.current_level > MAX_LEVELS:
+            self.state = 'victory'
+            self.audio.stop_music()
+            return
+
+        self.is_door_open = False
+        plan = self.take_prepared_level(self.current_level)
+        if plan is None:
+            plan = plan_level(self.current_level, self.level_random(self.current_level), self.map_size)
+        self.load_level(plan)
+
+        if self.pregenerate_levels and self.current_level < MAX_LEVELS:
+            self.prepare_level(self.current_level + 1)
+        if self.autosave is not None:
+            self.autosave.save(self)
+
+    def level_random(self, level):
+        """Gerador do nível `level`, com uma semente tirada do fluxo de níveis uma vez por nível.
+
+        Se a pré-geração não acabar a tempo, o nível é refeito com a mesma
+        semente e sai igual.
+        """
+        if self.level_seed is None or self.level_seed[0] != level:
+            self.level_seed = (level, self.level_rng.getrandbits(64))
+        return random.Random(self.level_seed[1])
+
+    def prepare_level(self, level):
+        """Começa a gerar o nível `level` em segundo plano."""
+        # A thread usa o seu próprio Random e não disputa os fluxos do World.
+        self.prepared_level = level_executor().submit(plan_level, level, self.level_random(level), self.map_size)
+
+    def take_prepared_level(self, level):
+        """Devolve o nível pré-gerado se já estiver pronto, ou None para o gerar agora."""
+        future, self.prepared_level = self.prepared_level, None
+        if future is None:
+            return None
+        if not future.done():
+            future.cancel()
+            return None
+        plan = future.result()
+        return plan if plan.level == level else None
+
+    def load_level(self, plan):
+        """Monta no World um nível já planeado."""
+        self.setup_level(plan.level_map, plan.tilemap)
+        self.player = Player(self, *plan.player_pos)
+        pool = self.pool
+        for entity in self.enemies + self.potions:
+            pool.release(entity)
+        # As posições guardadas podem ser de entidades agora reaproveitadas.
+        self.previous_positions = {}
+        self.set_enemies([pool.enemy(enemy_type, self, *pos) for enemy_type, pos in plan.enemy_spawns])
+        self.set_potions([pool.sprite("red_potion", pos) for pos in plan.potion_positions])
+
+    def damage_player(self, enemy):
+        """Aplica o toque de um inimigo ao jogador e verifica o fim de jogo."""
+        self.player.take_damage(enemy)
+        if self.player_lives <= 0:
+            self.state = 'game_over'
+            self.audio.stop_music()
+
+    def advance(self, frame_dt):
+        """Simula `frame_dt` segundos de tempo real em passos fixos; devolve o número de passos."""
+        self.accumulator += frame_dt
+        steps = int(self.accumulator // LOGIC_DT)
+        if steps > MAX_STEPS_PER_FRAME:
+            steps = MAX_STEPS_PER_FRAME
+            self.accumulator = steps * LOGIC_DT
+        for step in range(steps):
+            if step == steps - 1:
+                self.save_positions()
+            self.update(LOGIC_DT)
+        self.accumulator = max(self.accumulator - steps * LOGIC_DT, 0.0)
+        self.alpha = self.accumulator / LOGIC_DT
+        return steps
+
+    def save_positions(self):
+        """Guarda a posição das entidades que se movem, antes do passo que vai ser desenhado."""
+        positions = {enemy: (enemy.x, enemy.y) for enemy in self.enemies}
+        if self.player is not None:
+            positions[self.player] = (self.player.x, self.player.y)
+        self.previous_positions = positions
+
+    def update(self, dt):
+        """Avança a lógica do jogo em `dt` segundos."""
+        if self.state != 'playing':
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.input)
+        self.step_count += 1
+
+        profiler = self.profiler
+        player = self.player
+        player.update(dt)
+        if self.flow_field is not None:
+            self.flow_field.update(player.sprite.x, player.sprite.y)
+        profiler.lap('player')
+
+        # Atualizar inimigos e verificar colisões
+        grid = self.enemy_grid
+        batch = self.enemy_batch
+        if batch is not None:
+            batch.update(dt)
+            for enemy in batch.changed_cells(grid.cell_size):
+                grid.move(enemy, enemy.x, enemy.y)
+            enemy = batch.first_contact(player.sprite.rect)
+            if enemy is not None:
+                self.damage_player(enemy)
+        else:
+            # Só os inimigos nas células à volta do jogador chegam ao teste de retângulos.
+            player_rect = player.sprite.rect
+            contact_cells = grid.cells_near(player_rect)
+            # Janela que a câmara mostra, com folga: o que está dentro pensa a cada passo.
+            px, py = player.x, player.y
+            view_x, view_y = view_origin(px, py, self.tilemap)
+            view_left, view_top = view_x - AI_VIEW_MARGIN, view_y - AI_VIEW_MARGIN
+            view_right, view_bottom = view_x + WIDTH + AI_VIEW_MARGIN, view_y + HEIGHT + AI_VIEW_MARGIN
+            reduced_tick = self.step_count % AI_REDUCED_INTERVAL
+            # Os toques só contam depois de todos os inimigos se mexerem, como no modo em lote.
+            contacts = []
+            for index, enemy in enumerate(self.enemies[:]):
+                x, y = enemy.x, enemy.y
+                if not (view_left < x < view_right and view_top < y < view_bottom):
+                    # Fora do ecrã ninguém chega a tocar no jogador nem é visto a animar.
+                    if (x - px)**2 + (y - py)**2 > AI_SLEEP_RADIUS**2 or index % AI_REDUCED_INTERVAL != reduced_tick:
+                        continue
+                    enemy.update(dt * AI_REDUCED_INTERVAL, AI_REDUCED_INTERVAL, animate=False)
+                    grid.move(enemy, enemy.x, enemy.y)
+                    continue
+                enemy.update(dt)
+                if grid.move(enemy, enemy.x, enemy.y) in contact_cells and player_rect.colliderect(enemy.sprite.rect):
+                    contacts.append(enemy)
+            # Depois do primeiro toque o jogador fica invencível e os outros não contam.
+            for enemy in contacts:
+                self.damage_player(enemy)
+        profiler.lap('enemies')
+
+        # Processar ataques
+        if self.attack_hitbox:
+            for enemy in grid.query(self.attack_hitbox):
+                if self.attack_hitbox.colliderect(enemy.sprite.rect):
+                    enemy.take_damage(player)
+                    if enemy.health <= 0:
+                        self.enemies.remove(enemy)
+                        grid.remove(enemy)
+                        if batch is not None:
+                            batch.remove(enemy)
+                        self.pool.release(enemy)
+                    else:
+                        grid.move(enemy, enemy.x, enemy.y)
+                        if batch is not None:
+                            batch.sync_from(enemy)
+            self.attack_hitbox = None
+
+            if not self.enemies and not self.is_door_open:
+                self.open_the_door()
+        profiler.lap('attacks')
+
+        # Coletar poções
+        for potion in self.potion_grid.query(player.sprite.rect):
+            if player.sprite.rect.colliderect(potion.rect):
+                if self.player_lives < MAX_LIVES:
+                    self.player_lives += 1
+                self.potions.remove(potion)
+                self.potion_grid.remove(potion)
+                self.pool.release(potion)
+        profiler.lap('potions')
+
+        # Verificar se chegou à porta
+        if self.is_door_open and self.door and player.sprite.rect.colliderect(self.door.rect):
+            self.next_level()
+        profiler.lap('door')
@@ -0,0 +1,85 @@
+"""Executa o World sem janela nem áudio, tão depressa quanto o CPU permitir.
+
+Exemplo:
+    python headless.py --ticks 100000 --seed 1
+"""
+import argparse
+import random
+import time
+
+from engine import LOGIC_DT, MAP_HEIGHT, MAP_WIDTH, InputState, World
+from profiler import FrameProfiler
+
+class RandomInput(InputState):
+    """Bot simples: mantém uma direção aleatória durante alguns ticks e ataca de vez em quando."""
+    __slots__ = ('rng', 'hold')
+
+    def __init__(self, rng):
+        super().__init__()
+        self.rng = rng
+        self.hold = 0
+
+    def step(self):
+        """Escolhe as teclas premidas no próximo tick."""
+        self.space = self.rng.random() < 0.05
+        self.hold -= 1
+        if self.hold > 0:
+            return
+        self.hold = self.rng.randint(10, 60)
+        self.a = self.d = self.w = self.s = False
+        key = self.rng.choice(['a', 'd', 'w', 's', None])
+        if key:
+            setattr(self, key, True)
+
+def run_headless(world, ticks, dt=LOGIC_DT, restart=True):
+    """Avança `ticks` passos de lógica e devolve o tempo total em segundos.
+
+    Com `restart`, uma partida terminada (vitória ou derrota) recomeça logo,
+    para que todos os ticks exercitem a lógica do jogo.
+    """
+    step_input = getattr(world.input, 'step', None)
+    profiler = world.profiler
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if step_input:
+            step_input()
+        profiler.start_frame()
+        world.update(dt)
+        profiler.end_frame()
+        if restart and world.state != 'playing':
+            world.start()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--dt', type=float, default=LOGIC_DT)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--batched', action='store_true', help="IA dos inimigos em lote (NumPy)")
+    parser.add_argument('--flow-field', action='store_true', help="perseguição pelo campo de fluxo (BFS)")
+    parser.add_argument('--line-of-sight', action='store_true', help="os inimigos não veem através das paredes")
+    parser.add_argument('--visibility-table', action='store_true',
+                        help="com --line-of-sight, tabela a visibilidade de cada nível")
+    parser.add_argument('--pregenerate', action='store_true', help="prepara o nível seguinte numa thread")
+    parser.add_argument('--map-size', type=int, nargs=2, metavar=('LARGURA', 'ALTURA'),
+                        default=(MAP_WIDTH, MAP_HEIGHT), help="tamanho dos mapas, em tiles")
+    parser.add_argument('--profile', metavar='PREFIXO', help="grava o perfil por fase em PREFIXO.csv/.json")
+    args = parser.parse_args()
+
+    try:
+        world = World(RandomInput(random.Random(args.seed)), batched_enemies=args.batched,
+                      use_flow_field=args.flow_field, use_line_of_sight=args.line_of_sight,
+                      precompute_visibility=args.visibility_table, pregenerate_levels=args.pregenerate,
+                      profiler=FrameProfiler() if args.profile else None, seed=args.seed, map_size=args.map_size)
+    except ValueError as error:
+        parser.error(str(error))
+    world.start()
+    elapsed = run_headless(world, args.ticks, args.dt)
+    print(f"{args.ticks} ticks em {elapsed:.3f}s ({args.ticks / elapsed:.0f} ticks/s), "
+          f"nível {world.current_level}, vidas {world.player_lives}, semente {world.seed}")
+    if args.profile:
+        print("\n".join(world.profiler.build_overlay_lines()))
+        world.profiler.export(args.profile)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# === PATHFINDING ===
+# Campo de fluxo partilhado: uma única busca em largura (BFS) a partir do tile
+# do jogador indica a cada célula livre qual é o próximo passo até ele.
+from engine import TILE_SIZE
+
+# Passos máximos da BFS a partir do jogador. Os inimigos só perseguem dentro do
+# seu alcance de visão (~10 tiles), por isso caminhos mais longos não servem e,
+# em mapas grandes, o custo do recálculo deixa de depender do tamanho do mapa.
+MAX_PATH_STEPS = 48
+
+class FlowField:
+    """Campo de fluxo sobre o TileMap do nível, recalculado só quando o jogador muda de tile.
+
+    O "jogador" é só o ponto de destino: o bot de balance.py usa o mesmo campo
+    para chegar aos inimigos, com `max_steps` maior e sem exigir folga (o
+    jogador cabe num corredor de um tile).
+    """
+    def __init__(self, tilemap, max_steps=MAX_PATH_STEPS, clearance=True):
+        self.max_steps = max_steps
+        self.rows = tilemap.height
+        self.cols = tilemap.width
+        self.solid = tilemap.solid
+        self.clear = self.compute_clearance() if clearance else bytes(1 - s for s in self.solid)
+        self.player_cell = None
+        # Incrementa a cada recálculo, para quem guarda cópias do campo (ex.: EnemyBatch).
+        self.version = 0
+        # Centro da próxima célula do caminho, por célula; None no tile do jogador
+        # e nas células sem caminho até ele (ou a mais de `max_steps` passos).
+        self.target_x = [None] * (self.rows * self.cols)
+        self.target_y = [None] * (self.rows * self.cols)
+        # Células preenchidas pela última BFS, para as limpar sem percorrer o mapa todo.
+        self.reached = []
+
+    def compute_clearance(self):
+        """Marca as células livres rodeadas só por células livres.
+
+        Os sprites dos inimigos chegam a 18 px em tiles de 16 px: centrados numa
+        célula encostada a uma parede, sobrepõem-na e ficam presos. A BFS só se
+        propaga por células com folga à volta.
+        """
+        rows, cols, solid = self.rows, self.cols, self.solid
+        clear = bytearray(rows * cols)
+        for row in range(1, rows - 1):
+            for col in range(1, cols - 1):
+                if not any(solid[(row + dr) * cols + col + dc] for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+                    clear[row * cols + col] = 1
+        return clear
+
+    def cell_index(self, x, y):
+        """Índice da célula que contém o ponto, ou None se estiver fora do mapa."""
+        col, row = int(x // TILE_SIZE), int(y // TILE_SIZE)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def update(self, player_x, player_y):
+        """Refaz a BFS se o jogador entrou noutro tile."""
+        cell = self.cell_index(player_x, player_y)
+        if cell == self.player_cell:
+            return
+        self.player_cell = cell
+        self.version += 1
+
+        cols, solid, clear = self.cols, self.solid, self.clear
+        target_x, target_y = self.target_x, self.target_y
+        for reached in self.reached:
+            target_x[reached] = target_y[reached] = None
+        self.reached = reached = []
+        if cell is None or solid[cell]:
+            return
+
+        visited = bytearray(self.rows * cols)
+        visited[cell] = 1
+        # BFS por camadas: `frontier` tem as células a `steps` passos do jogador.
+        frontier = [cell]
+        for steps in range(1, self.max_steps + 1):
+            next_frontier = []
+            for current in frontier:
+                row, col = divmod(current, cols)
+                center_x = col * TILE_SIZE + TILE_SIZE / 2
+                center_y = row * TILE_SIZE + TILE_SIZE / 2
+                # Só vizinhos ortogonais: um passo na diagonal cortaria os cantos das paredes.
+                for neighbour, valid in ((current - cols, row > 0), (current + cols, row < self.rows - 1),
+                                         (current - 1, col > 0), (current + 1, col < cols - 1)):
+                    if valid and not visited[neighbour] and not solid[neighbour]:
+                        visited[neighbour] = 1
+                        target_x[neighbour] = center_x
+                        target_y[neighbour] = center_y
+                        reached.append(neighbour)
+                        # Células sem folga recebem um passo mas não propagam a busca.
+                        if clear[neighbour]:
+                            next_frontier.append(neighbour)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+    def next_step(self, x, y):
+        """Ponto para onde um inimigo em (x, y) deve seguir, ou None para ir direto ao jogador."""
+        cell = self.cell_index(x, y)
+        if cell is None or self.target_x[cell] is None:
+            return None
+        return self.target_x[cell], self.target_y[cell]
@@ -0,0 +1,126 @@
+# === PERFIL POR FASE ===
+# Mede quanto tempo cada fase de update() e draw() ocupa em cada frame, com
+# percentis numa janela deslizante e um registo dos frames lentos (hitches).
+import csv
+import json
+import time
+from collections import deque
+
+DEFAULT_WINDOW = 600           # frames guardados para os percentis (~10 s a 60 FPS)
+DEFAULT_HITCH_MS = 1000 / 30   # um frame que falha dois vsyncs a 60 FPS
+PERCENTILES = (50, 95, 99)
+OVERLAY_REFRESH_FRAMES = 30    # o texto do overlay só é recalculado a cada N frames
+
+class NullProfiler:
+    """Perfil sem efeito, usado quando a instrumentação está desligada."""
+    def start_frame(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+class FrameProfiler:
+    """Cronómetro por fase: `lap(fase)` atribui à fase o tempo desde a marca anterior."""
+    def __init__(self, window=DEFAULT_WINDOW, hitch_ms=DEFAULT_HITCH_MS, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.hitch_ns = hitch_ms * 1e6
+        self.frames = deque(maxlen=window)  # cada frame: dict fase -> ns, mais 'total' e 'interval'
+        self.hitches = deque(maxlen=1000)
+        self.frame_count = 0
+        self.current = None
+        self.frame_start = self.last_mark = None
+        self.overlay_visible = False
+        self.overlay_stamp = None
+        self.overlay_cache = []
+
+    def start_frame(self):
+        now = self.clock()
+        interval = now - self.frame_start if self.frame_start is not None else 0
+        self.frame_start = self.last_mark = now
+        self.current = {'interval': interval}
+
+    def lap(self, phase):
+        if self.current is None:
+            return
+        now = self.clock()
+        self.current[phase] = self.current.get(phase, 0) + now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        frame = self.current
+        frame['total'] = self.clock() - self.frame_start
+        self.current = None
+        self.frame_count += 1
+        self.frames.append(frame)
+        if frame['total'] > self.hitch_ns:
+            self.hitches.append((self.frame_count, frame))
+
+    def phases(self):
+        """Nomes das fases vistas na janela, pela ordem em que aparecem."""
+        names = {}
+        for frame in self.frames:
+            names.update(dict.fromkeys(frame))
+        names.pop('interval', None)
+        names.pop('total', None)
+        return list(names) + ['total']
+
+    def percentiles(self):
+        """Percentis (em ms) de cada fase na janela atual."""
+        summary = {}
+        for phase in self.phases():
+            samples = sorted(frame.get(phase, 0) for frame in self.frames)
+            summary[phase] = {
+                f'p{p}': samples[min(len(samples) - 1, len(samples) * p // 100)] / 1e6 for p in PERCENTILES
+            }
+        return summary
+
+    def overlay_lines(self):
+        """Linhas de texto para o overlay no ecrã, recalculadas a cada OVERLAY_REFRESH_FRAMES."""
+        stamp = self.frame_count // OVERLAY_REFRESH_FRAMES
+        if stamp != self.overlay_stamp:
+            self.overlay_stamp = stamp
+            self.overlay_cache = self.build_overlay_lines()
+        return self.overlay_cache
+
+    def build_overlay_lines(self):
+        if not self.frames:
+            return []
+        lines = [f"{'fase':<14}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase, values in self.percentiles().items():
+            lines.append(f"{phase:<14}" + "".join(f"{values[f'p{p}']:>7.2f}" for p in PERCENTILES))
+        lines.append(f"hitches: {len(self.hitches)}")
+        return lines
+
+    def export_csv(self, path):
+        """Grava um frame por linha, com o tempo de cada fase em ms."""
+        phases = self.phases()
+        first_frame = self.frame_count - len(self.frames) + 1
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'interval'] + phases)
+            for number, frame in enumerate(self.frames, first_frame):
+                writer.writerow([number, frame['interval'] / 1e6] + [frame.get(p, 0) / 1e6 for p in phases])
+
+    def export_json(self, path):
+        """Grava os percentis da janela e o registo de hitches."""
+        report = {
+            'frames': self.frame_count,
+            'hitch_ms': self.hitch_ns / 1e6,
+            'percentiles_ms': self.percentiles(),
+            'hitches': [
+                {'frame': number, 'phases_ms': {phase: ns / 1e6 for phase, ns in frame.items()}}
+                for number, frame in self.hitches
+            ],
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def export(self, prefix):
+        """Grava `prefix`.csv e `prefix`.json."""
+        self.export_csv(prefix + '.csv')
+        self.export_json(prefix + '.json')
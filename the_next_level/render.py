@@ -0,0 +1,217 @@
+# === DESENHO DO MUNDO ===
+# Desenha um World num Screen do pgzero; usado pelo jogo e pelos benchmarks.
+from collections import OrderedDict
+
+import pygame
+from pgzero.loaders import images
+from pgzero.rect import Rect
+
+from engine import HEIGHT, TILE_SIZE, WIDTH, Cyclops, Enemy, Ghost, Player, view_origin
+from text_cache import TextCache
+from tilemap import TILE_IMAGES
+
+# O fundo do nível é composto em blocos quadrados; só os que intersetam a
+# janela são desenhados, por isso o custo depende do ecrã e não do mapa.
+CHUNK_TILES = 16
+CHUNK_SIZE = CHUNK_TILES * TILE_SIZE
+# Blocos guardados por nível (~256 KB cada); os menos usados são descartados.
+MAX_CACHED_CHUNKS = 96
+# Blocos do próximo nível compostos por frame enquanto ele é pré-gerado.
+PREBAKE_CHUNKS_PER_FRAME = 1
+
+# Superfícies partilhadas por código de tile, carregadas uma única vez.
+_tile_surfaces = None
+
+def tile_surfaces():
+    """Devolve a superfície de cada código de tile estático."""
+    global _tile_surfaces
+    if _tile_surfaces is None:
+        _tile_surfaces = {code: images.load(name) for code, name in TILE_IMAGES.items()}
+    return _tile_surfaces
+
+# Frames de cada AnimationAtlas, compostos uma única vez.
+_atlas_frames = {}
+
+def atlas_frames(atlas):
+    """Devolve a superfície de cada frame do atlas, incluindo os virados para a esquerda.
+
+    Os frames são compostos lado a lado numa única folha; cada frame é uma
+    subsuperfície dessa folha.
+    """
+    frames = _atlas_frames.get(atlas)
+    if frames is None:
+        right = [images.load(name) for name in atlas.names]
+        left = [images.load(left_name) if left_name else pygame.transform.flip(surface, True, False)
+                for left_name, surface in zip(atlas.left_names, right)]
+        sheet = pygame.Surface((sum(w for w, _ in atlas.sizes), max(h for _, h in atlas.sizes)),
+                               pygame.SRCALPHA)
+        frames, x = [], 0
+        for surface in right + left:
+            # Sobre a folha transparente, a soma copia os pixels (e o alfa) sem misturar.
+            sheet.blit(surface, (x, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            frames.append(sheet.subsurface((x, 0), surface.get_size()))
+            x += surface.get_width()
+        _atlas_frames[atlas] = frames
+    return frames
+
+def prepare_surfaces():
+    """Compõe já as superfícies partilhadas dos tiles e das personagens (ver assets.py)."""
+    tile_surfaces()
+    for character in (Player, Enemy, Ghost, Cyclops):
+        atlas_frames(character.atlas)
+
+def bake_chunk(tilemap, chunk_col, chunk_row):
+    """Compõe os tiles estáticos de um bloco do mapa numa superfície própria."""
+    first_col, first_row = chunk_col * CHUNK_TILES, chunk_row * CHUNK_TILES
+    cols = min(CHUNK_TILES, tilemap.width - first_col)
+    rows = min(CHUNK_TILES, tilemap.height - first_row)
+    surface = pygame.Surface((cols * TILE_SIZE, rows * TILE_SIZE))
+    surfaces = tile_surfaces()
+    width, tiles = tilemap.width, tilemap.tiles
+    blits = []
+    for row in range(rows):
+        start = (first_row + row) * width + first_col
+        for col, code in enumerate(tiles[start:start + cols]):
+            tile = surfaces.get(code)
+            if tile:
+                blits.append((tile, (col * TILE_SIZE, row * TILE_SIZE)))
+    surface.blits(blits, doreturn=False)
+    return surface
+
+class Camera:
+    """Janela do tamanho do ecrã sobre o mapa, centrada num ponto sem sair dos limites do mapa."""
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.width = width
+        self.height = height
+        self.x = self.y = 0
+
+    def follow(self, x, y, tilemap):
+        self.x, self.y = view_origin(x, y, tilemap, self.width, self.height)
+
+    @property
+    def rect(self):
+        return Rect((self.x, self.y), (self.width, self.height))
+
+    def chunks(self, tilemap):
+        """Blocos do mapa que intersetam a janela, como (coluna, linha)."""
+        last_col = min(self.x + self.width - 1, tilemap.width * TILE_SIZE - 1) // CHUNK_SIZE
+        last_row = min(self.y + self.height - 1, tilemap.height * TILE_SIZE - 1) // CHUNK_SIZE
+        return [(col, row) for row in range(self.y // CHUNK_SIZE, last_row + 1)
+                for col in range(self.x // CHUNK_SIZE, last_col + 1)]
+
+class ChunkedBackground:
+    """Fundo de um nível em blocos de CHUNK_TILES x CHUNK_TILES tiles, compostos só quando são vistos."""
+    def __init__(self, tilemap):
+        self.tilemap = tilemap
+        self.chunks = OrderedDict()  # (coluna, linha) -> superfície, do menos para o mais usado
+
+    def chunk(self, col, row):
+        key = (col, row)
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self.chunks[key] = bake_chunk(self.tilemap, col, row)
+            if len(self.chunks) > MAX_CACHED_CHUNKS:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return surface
+
+    def bake_some(self, keys, limit):
+        """Compõe até `limit` dos blocos indicados que ainda não existam."""
+        for key in keys:
+            if limit <= 0:
+                return
+            if key not in self.chunks:
+                self.chunk(*key)
+                limit -= 1
+
+    def draw(self, surface, camera):
+        """Desenha os blocos visíveis pela câmara."""
+        surface.blits([(self.chunk(col, row), (col * CHUNK_SIZE - camera.x, row * CHUNK_SIZE - camera.y))
+                       for col, row in camera.chunks(self.tilemap)], doreturn=False)
+
+class WorldRenderer:
+    """Desenha o nível, as entidades e o HUD através de uma câmara que segue o jogador."""
+    def __init__(self, text_cache=None):
+        self.text = text_cache if text_cache is not None else TextCache()
+        self.camera = Camera()
+        # Fundo em blocos do nível atual.
+        self.background = None
+        # Fundo do nível pré-gerado, cujos primeiros blocos visíveis são compostos antes da transição.
+        self.pending_background = None
+        self.pending_camera = Camera()
+
+    def draw_sprite(self, screen, sprite, offset=None):
+        """Desenha um sprite do World na sua posição atual, deslocado por `offset` se houver."""
+        x, y = sprite.rect.topleft
+        x, y = x - self.camera.x, y - self.camera.y
+        if offset is not None:
+            x, y = x + offset[0], y + offset[1]
+        if sprite.atlas is None:
+            screen.blit(sprite.image, (x, y))
+        else:
+            screen.surface.blit(atlas_frames(sprite.atlas)[sprite.frame], (x, y))
+
+    def draw_entity(self, screen, entity, previous, blend):
+        """Desenha uma entidade entre a posição anterior e a atual (ver World.advance)."""
+        prev = previous.get(entity)
+        if prev is None:
+            self.draw_sprite(screen, entity.sprite)
+        else:
+            self.draw_sprite(screen, entity.sprite, ((prev[0] - entity.x) * blend, (prev[1] - entity.y) * blend))
+
+    def draw_level(self, screen, world):
+        """Desenha os blocos de fundo visíveis e a porta por cima."""
+        tilemap = world.tilemap
+        if self.background is None or self.background.tilemap is not tilemap:
+            pending = self.pending_background
+            if pending is not None and pending.tilemap is tilemap:
+                self.background = pending
+            else:
+                self.background = ChunkedBackground(tilemap)
+            self.pending_background = None
+        camera = self.camera
+        if tilemap.width * TILE_SIZE < camera.width or tilemap.height * TILE_SIZE < camera.height:
+            screen.fill((0, 0, 0))  # o mapa não cobre a janela toda
+        self.background.draw(screen.surface, camera)
+        if world.door and camera.rect.colliderect(world.door.rect):
+            self.draw_sprite(screen, world.door)
+
+    def prebake(self, world):
+        """Compõe alguns blocos do nível pré-gerado pelo World, os que se vão ver primeiro."""
+        future = world.prepared_level
+        if future is None or not future.done() or future.cancelled():
+            return
+        plan = future.result()
+        pending = self.pending_background
+        if pending is None or pending.tilemap is not plan.tilemap:
+            pending = self.pending_background = ChunkedBackground(plan.tilemap)
+            self.pending_camera.follow(*plan.player_pos, plan.tilemap)
+        pending.bake_some(self.pending_camera.chunks(plan.tilemap), PREBAKE_CHUNKS_PER_FRAME)
+
+    def draw_playing(self, screen, world):
+        """Desenha o estado 'playing': nível, poções, personagens e HUD."""
+        profiler = world.profiler
+        # As entidades são desenhadas `alpha` do caminho entre o penúltimo e o último passo de lógica.
+        previous, blend = world.previous_positions, 1 - world.alpha
+        player = world.player
+        prev = previous.get(player, (player.x, player.y))
+        self.camera.follow(player.x + (prev[0] - player.x) * blend, player.y + (prev[1] - player.y) * blend,
+                           world.tilemap)
+        self.draw_level(screen, world)
+        profiler.lap('draw_level')
+        # Só as entidades nas células da grelha espacial à volta da janela.
+        view = self.camera.rect
+        for potion in world.potion_grid.query(view):
+            self.draw_sprite(screen, potion)
+        if player.visible:
+            self.draw_entity(screen, player, previous, blend)
+        for enemy in world.enemy_grid.query(view):
+            self.draw_entity(screen, enemy, previous, blend)
+        profiler.lap('draw_entities')
+        # O HUD só volta a ser renderizado quando as vidas ou o nível mudam.
+        self.text.draw(screen.surface, f"Vidas: {world.player_lives}", topleft=(10, 10), color="white", owidth=1, ocolor="black")
+        self.text.draw(screen.surface, f"Nível: {world.current_level}", topright=(WIDTH - 10, 10), color="white", owidth=1, ocolor="black")
+        profiler.lap('draw_hud')
+        self.prebake(world)
+        profiler.lap('prebake')
@@ -0,0 +1,133 @@
+"""Grava as teclas de uma partida e reprodu-la sem janela, tão depressa quanto o CPU permitir.
+
+A gravação guarda a semente, as opções e o tamanho do mapa do World e um byte por passo de
+lógica com as teclas premidas; no fim, o estado final serve para confirmar
+que a reprodução chegou ao mesmo sítio.
+
+Exemplos:
+    THE_NEXT_LEVEL_RECORD=partida python the_next_level.py
+    python replay.py partida-1234.replay
+    python replay.py partida-1234.replay --profile perfil
+"""
+import argparse
+import struct
+
+from engine import LOGIC_DT, InputState, World
+from headless import run_headless
+from profiler import FrameProfiler
+
+KEYS = ('a', 'd', 'w', 's', 'space')  # bit i do byte de cada passo = KEYS[i]
+STATES = ('playing', 'game_over', 'victory')
+
+MAGIC = b'TNLR'
+VERSION = 4
+HEADER = struct.Struct('<4sBQBHHI')  # assinatura, versão, semente, opções, tamanho do mapa, n.º de passos
+SUMMARY = struct.Struct('<Bhhdd')  # estado, nível, vidas, posição do jogador
+
+# Opções do World que mudam a simulação, como bits do byte de opções.
+OPTION_BITS = ('batched_enemies', 'use_flow_field', 'pregenerate_levels', 'use_line_of_sight',
+               'precompute_visibility')
+
+def pack_keys(source):
+    """Estado das teclas de `source` num só byte."""
+    keys = 0
+    for bit, name in enumerate(KEYS):
+        if getattr(source, name):
+            keys |= 1 << bit
+    return keys
+
+def world_summary(world):
+    player = world.player
+    return (STATES.index(world.state), world.current_level, world.player_lives,
+            player.x if player else 0.0, player.y if player else 0.0)
+
+class InputRecorder:
+    """Regista as teclas lidas pelo World em cada passo de lógica (ver World.update)."""
+    def __init__(self, world):
+        self.seed = world.seed
+        self.options = sum(1 << bit for bit, name in enumerate(OPTION_BITS) if getattr(world, name))
+        self.map_size = world.map_size
+        self.ticks = bytearray()
+
+    def record(self, source):
+        self.ticks.append(pack_keys(source))
+
+    def save(self, path, world):
+        """Grava o cabeçalho, as teclas e o estado final do `world`."""
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.options, *self.map_size, len(self.ticks)))
+            f.write(self.ticks)
+            f.write(SUMMARY.pack(*world_summary(world)))
+
+class Recording:
+    """Gravação lida de um ficheiro."""
+    def __init__(self, seed, options, map_size, ticks, summary):
+        self.seed = seed
+        self.options = options
+        self.map_size = map_size
+        self.ticks = ticks
+        self.summary = summary
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, options, map_width, map_height, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} não é uma gravação válida.")
+        ticks = data[HEADER.size:HEADER.size + count]
+        summary = SUMMARY.unpack_from(data, HEADER.size + count)
+        return cls(seed, options, (map_width, map_height), ticks, summary)
+
+    def world_options(self):
+        return {name: bool(self.options >> bit & 1) for bit, name in enumerate(OPTION_BITS)}
+
+class ReplayInput(InputState):
+    """Fonte de entrada que devolve as teclas gravadas, um passo por chamada a step()."""
+    __slots__ = ('ticks', 'position')
+
+    def __init__(self, ticks):
+        super().__init__()
+        self.ticks = ticks
+        self.position = 0
+
+    def step(self):
+        keys = self.ticks[self.position]
+        self.position += 1
+        self.a = keys & 1 != 0
+        self.d = keys & 2 != 0
+        self.w = keys & 4 != 0
+        self.s = keys & 8 != 0
+        self.space = keys & 16 != 0
+
+def replay(recording, profiler=None):
+    """Reproduz a gravação num World novo; devolve o World e o tempo total em segundos."""
+    world = World(ReplayInput(recording.ticks), profiler=profiler, seed=recording.seed,
+                  map_size=recording.map_size, **recording.world_options())
+    world.start()
+    elapsed = run_headless(world, len(recording.ticks), LOGIC_DT, restart=False)
+    return world, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--profile', metavar='PREFIXO', help="grava o tempo de cada passo em PREFIXO.csv/.json")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.path)
+    ticks = len(recording.ticks)
+    profiler = FrameProfiler(window=max(ticks, 1))
+    world, elapsed = replay(recording, profiler)
+
+    print(f"{ticks} passos em {elapsed:.3f}s ({ticks / elapsed:.0f} passos/s, "
+          f"{ticks * LOGIC_DT / elapsed:.0f}x o tempo real), semente {recording.seed}")
+    print("\n".join(profiler.build_overlay_lines()))
+    if world_summary(world) == recording.summary:
+        print("Estado final igual ao da gravação.")
+    else:
+        print(f"Estado final diferente: gravado {recording.summary}, reproduzido {world_summary(world)}")
+    if args.profile:
+        profiler.export(args.profile)
+
+if __name__ == '__main__':
+    main()
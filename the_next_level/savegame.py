@@ -0,0 +1,198 @@
+"""Guarda e retoma o estado completo de uma partida num ficheiro binário compacto.
+
+O ficheiro tem um cabeçalho com o estado do World e do jogador, os tiles do
+nível (um byte por célula), o estado dos dois geradores aleatórios e os
+campos dos inimigos e das poções empacotados campo a campo. Uma partida
+retomada continua exatamente como continuaria a original (no modo em lote,
+a patrulha dos inimigos volta a ser sorteada).
+
+O jogo grava automaticamente a cada nível e ao sair, e o menu retoma a
+última partida (ver the_next_level.py).
+
+Exemplo (resume um save e mede a gravação e a leitura):
+    python savegame.py ~/.the_next_level.sav
+"""
+import argparse
+import os
+import struct
+import time
+
+from engine import MAX_LEVELS, Cyclops, Enemy, Ghost, Player, Sprite, World
+from replay import OPTION_BITS, STATES
+from tilemap import TileMap
+
+MAGIC = b'TNLS'
+VERSION = 1
+# assinatura, versão, semente, opções, tamanho do mapa, estado, nível, vidas,
+# porta aberta, passos de lógica, semente do último nível sorteado (nível, semente)
+HEADER = struct.Struct('<4sBQBHHBbb?QbQ')
+# posição, direção, estado, frame, temporizadores (animação, invencível, cooldown, ataque)
+PLAYER = struct.Struct('<ddBBBBdddd')
+RNG_WORDS = 625  # palavras de 32 bits do estado do Mersenne Twister
+RNG = struct.Struct(f'<{RNG_WORDS}I?d')  # estado, há gauss_next, gauss_next
+COUNTS = struct.Struct('<HH')  # inimigos, poções
+
+DIRECTIONS = ('up', 'down', 'left', 'right')
+PLAYER_STATES = ('idle', 'walk', 'attack')
+ENEMY_TYPES = (Enemy, Ghost, Cyclops)
+ENEMY_STATES = ('patrolling', 'chasing')
+ENEMY_DIRECTIONS = ('right', 'left')
+# Campos de cada inimigo, gravados um array por campo: tipo, posição, vida,
+# estado, direção, vetor de movimento, temporizadores, frame e frame do sprite.
+ENEMY_FIELDS = 'BddhBBddddBB'
+
+def enemy_fields(enemy):
+    return (ENEMY_TYPES.index(type(enemy)), enemy.x, enemy.y, enemy.health,
+            ENEMY_STATES.index(enemy.state), ENEMY_DIRECTIONS.index(enemy.direction_str),
+            *enemy.direction_vector, enemy.patrol_timer, enemy.anim_timer, enemy.current_frame, enemy.sprite.frame)
+
+def pack_rng(rng):
+    version, words, gauss_next = rng.getstate()
+    return RNG.pack(*words, gauss_next is not None, gauss_next or 0.0)
+
+def unpack_rng(rng, data, offset):
+    *words, has_gauss, gauss_next = RNG.unpack_from(data, offset)
+    rng.setstate((3, tuple(words), gauss_next if has_gauss else None))
+    return offset + RNG.size
+
+def snapshot(world):
+    """Estado completo do World em bytes."""
+    player = world.player
+    options = sum(1 << bit for bit, name in enumerate(OPTION_BITS) if getattr(world, name))
+    level_seed_level, level_seed = world.level_seed if world.level_seed is not None else (-1, 0)
+    parts = [
+        HEADER.pack(MAGIC, VERSION, world.seed, options, world.tilemap.width, world.tilemap.height,
+                    STATES.index(world.state), world.current_level, world.player_lives, world.is_door_open,
+                    world.step_count, level_seed_level, level_seed),
+        PLAYER.pack(player.x, player.y, DIRECTIONS.index(player.direction), PLAYER_STATES.index(player.state),
+                    player.current_frame, player.sprite.frame, player.anim_timer, player.invincible_timer,
+                    player.attack_cooldown_timer, player.attack_anim_timer),
+        bytes(world.tilemap.tiles),
+        pack_rng(world.level_rng),
+        pack_rng(world.ai_rng),
+        COUNTS.pack(len(world.enemies), len(world.potions)),
+    ]
+    enemies = [enemy_fields(enemy) for enemy in world.enemies]
+    for index, code in enumerate(ENEMY_FIELDS):
+        parts.append(struct.pack(f'<{len(enemies)}{code}', *(fields[index] for fields in enemies)))
+    potions = world.potions
+    parts.append(struct.pack(f'<{2 * len(potions)}d', *(value for p in potions for value in p.pos)))
+    return b''.join(parts)
+
+def restore(data, input_source=None, audio=None, profiler=None):
+    """Cria um World a partir de bytes de snapshot(), pronto a continuar."""
+    (magic, version, seed, options, width, height, state, level, lives, door_open,
+     step_count, level_seed_level, level_seed) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Não é um save válido desta versão do jogo.")
+    offset = HEADER.size
+    (x, y, direction, player_state, current_frame, frame,
+     anim_timer, invincible_timer, attack_cooldown_timer, attack_anim_timer) = PLAYER.unpack_from(data, offset)
+    offset += PLAYER.size
+    tiles = data[offset:offset + width * height]
+    offset += width * height
+
+    world = World(input_source, audio, profiler=profiler, seed=seed, map_size=(width, height),
+                  **{name: bool(options >> bit & 1) for bit, name in enumerate(OPTION_BITS)})
+    world.state = STATES[state]
+    world.current_level = level
+    world.player_lives = lives
+    world.step_count = step_count
+    world.level_seed = (level_seed_level, level_seed) if level_seed_level >= 0 else None
+    tilemap = TileMap(width, height, tiles)
+    world.setup_level(tilemap.rows(), tilemap)
+
+    player = world.player = Player(world, x, y)
+    player.direction = DIRECTIONS[direction]
+    player.state = PLAYER_STATES[player_state]
+    player.current_frame = current_frame
+    player.sprite.frame = frame
+    player.anim_timer = anim_timer
+    player.invincible_timer = invincible_timer
+    player.attack_cooldown_timer = attack_cooldown_timer
+    player.attack_anim_timer = attack_anim_timer
+
+    # Os geradores são repostos só depois de criar os inimigos, que tiram
+    # números ao nascer.
+    rng_offset = offset
+    offset += 2 * RNG.size
+    enemy_count, potion_count = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    columns = []
+    for code in ENEMY_FIELDS:
+        column = struct.Struct(f'<{enemy_count}{code}')
+        columns.append(column.unpack_from(data, offset))
+        offset += column.size
+    enemies = []
+    for (enemy_type, ex, ey, health, enemy_state, enemy_direction, dir_x, dir_y,
+         patrol_timer, enemy_anim_timer, enemy_frame, sprite_frame) in zip(*columns):
+        enemy = ENEMY_TYPES[enemy_type](world, ex, ey)
+        enemy.health = health
+        enemy.state = ENEMY_STATES[enemy_state]
+        enemy.direction_str = ENEMY_DIRECTIONS[enemy_direction]
+        enemy.direction_vector = (dir_x, dir_y)
+        enemy.patrol_timer = patrol_timer
+        enemy.anim_timer = enemy_anim_timer
+        enemy.current_frame = enemy_frame
+        enemy.sprite.frame = sprite_frame
+        enemies.append(enemy)
+    world.set_enemies(enemies)
+    positions = struct.unpack_from(f'<{2 * potion_count}d', data, offset)
+    world.set_potions([Sprite("red_potion", positions[i:i + 2]) for i in range(0, len(positions), 2)])
+    if door_open:
+        world.open_the_door()
+
+    rng_offset = unpack_rng(world.level_rng, data, rng_offset)
+    unpack_rng(world.ai_rng, data, rng_offset)
+    if world.pregenerate_levels and world.state == 'playing' and level < MAX_LEVELS:
+        world.prepare_level(level + 1)
+    return world
+
+def save(world, path):
+    """Grava o snapshot do World; o ficheiro anterior só é substituído quando o novo está completo."""
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(snapshot(world))
+    os.replace(temporary, path)
+
+def load(path, input_source=None, audio=None, profiler=None):
+    with open(path, 'rb') as f:
+        return restore(f.read(), input_source, audio, profiler)
+
+def describe(path):
+    """(nível, vidas) do save em `path`, ou None se não houver um save válido."""
+    try:
+        with open(path, 'rb') as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    magic, version, *_, level, lives = header[:9]
+    if magic != MAGIC or version != VERSION:
+        return None
+    return level, lives
+
+class Autosave:
+    """Grava o World em `path` a cada mudança de nível (ver World.next_level)."""
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, world):
+        save(world, self.path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    world = load(args.path)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    data = snapshot(world)
+    saved = time.perf_counter() - start
+    print(f"nível {world.current_level}, vidas {world.player_lives}, {len(world.enemies)} inimigos, "
+          f"mapa {world.tilemap.width}x{world.tilemap.height}, semente {world.seed}")
+    print(f"{len(data)} bytes; leitura {loaded * 1000:.2f} ms, gravação {saved * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
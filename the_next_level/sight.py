@@ -0,0 +1,131 @@
+# === LINHA DE VISÃO ===
+# Um inimigo só vê o jogador se nenhuma parede estiver na reta entre os tiles
+# dos dois. O resultado depende só do par de tiles, por isso fica em cache e a
+# reta só é percorrida de novo quando um deles entra noutro tile.
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # a tabela de visibilidade é opcional
+    np = None
+
+from engine import TILE_SIZE, Cyclops, Enemy, Ghost
+
+MAX_CACHED_PAIRS = 1 << 16  # pares de tiles guardados antes de a cache recomeçar
+
+@lru_cache(maxsize=None)
+def line_offsets(dx, dy):
+    """Tiles atravessados pela reta de (0, 0) até (dx, dy), sem as pontas (Bresenham).
+
+    A reta é sempre traçada no mesmo sentido, para que A veja B se e só se B
+    vir A.
+    """
+    if (dy, dx) < (0, 0):
+        return tuple((dx + ox, dy + oy) for ox, oy in line_offsets(-dx, -dy))
+    step_x, step_y = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+    adx, ady = abs(dx), abs(dy)
+    error = adx - ady
+    x = y = 0
+    cells = []
+    while (x, y) != (dx, dy):
+        twice = 2 * error
+        if twice > -ady:
+            error -= ady
+            x += step_x
+        if twice < adx:
+            error += adx
+            y += step_y
+        cells.append((x, y))
+    return tuple(cells[:-1])
+
+class LineOfSight:
+    """Consultas de linha de visão sobre o TileMap do nível, com cache por par de tiles.
+
+    Com `precompute`, uma VisibilityTable responde logo aos pares dentro do
+    alcance de visão e a reta só é percorrida para os mais distantes.
+    """
+    def __init__(self, tilemap, precompute=False):
+        self.cols = tilemap.width
+        self.rows = tilemap.height
+        self.solid = tilemap.solid
+        self.cache = {}  # (tile, tile) -> visível
+        self.table = VisibilityTable(tilemap) if precompute else None
+
+    def visible(self, x0, y0, x1, y1):
+        """Se o ponto (x1, y1) é visível de (x0, y0)."""
+        col0, row0 = int(x0 // TILE_SIZE), int(y0 // TILE_SIZE)
+        col1, row1 = int(x1 // TILE_SIZE), int(y1 // TILE_SIZE)
+        if self.table is not None:
+            seen = self.table.lookup(col0, row0, col1, row1)
+            if seen is not None:
+                return seen
+        # Chave única para o par, na mesma ordem para A->B e B->A.
+        cell0, cell1 = (row0, col0), (row1, col1)
+        key = (cell0, cell1) if cell0 <= cell1 else (cell1, cell0)
+        seen = self.cache.get(key)
+        if seen is None:
+            if len(self.cache) >= MAX_CACHED_PAIRS:
+                self.cache.clear()
+            seen = self.cache[key] = self.trace(col0, row0, col1, row1)
+        return seen
+
+    def trace(self, col0, row0, col1, row1):
+        """Percorre a reta entre os dois tiles; fora do mapa nada bloqueia (como TileMap.is_solid)."""
+        cols, rows, solid = self.cols, self.rows, self.solid
+        for dx, dy in line_offsets(col1 - col0, row1 - row0):
+            col, row = col0 + dx, row0 + dy
+            if 0 <= col < cols and 0 <= row < rows and solid[row * cols + col]:
+                return False
+        return True
+
+class VisibilityTable:
+    """Visibilidade pré-calculada de cada tile para todos os tiles à distância de visão.
+
+    Para cada deslocamento (dx, dy) no raio, a reta atravessa sempre os mesmos
+    tiles relativos, por isso a visibilidade desse deslocamento a partir de
+    todos os tiles do mapa sai de uma só vez, com um AND do mapa de tiles
+    livres deslocado por cada um deles. Os bits ficam empacotados, um byte
+    por cada 8 deslocamentos.
+    """
+    def __init__(self, tilemap, vision_range=None):
+        if np is None:
+            raise RuntimeError("A tabela de visibilidade precisa do NumPy.")
+        if vision_range is None:
+            vision_range = max(cls.vision_range for cls in (Enemy, Ghost, Cyclops))
+        # Os tiles estão a menos de um tile de distância das posições que contêm.
+        radius = int(vision_range // TILE_SIZE) + 1
+        self.radius = radius
+        self.cols, self.rows = cols, rows = tilemap.width, tilemap.height
+        offsets = [(dx, dy) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+                   if dx * dx + dy * dy <= radius * radius]
+        # Índice de cada deslocamento na tabela, ou -1 fora do raio.
+        side = 2 * radius + 1
+        self.offset_index = [-1] * (side * side)
+        for index, (dx, dy) in enumerate(offsets):
+            self.offset_index[(dy + radius) * side + dx + radius] = index
+
+        free = np.frombuffer(bytes(tilemap.solid), dtype=np.uint8).reshape(rows, cols) == 0
+        padded = np.ones((rows + 2 * radius, cols + 2 * radius), dtype=bool)
+        padded[radius:radius + rows, radius:radius + cols] = free
+        visible = np.empty((rows * cols, len(offsets)), dtype=bool)
+        for index, (dx, dy) in enumerate(offsets):
+            clear = np.ones((rows, cols), dtype=bool)
+            for ox, oy in line_offsets(dx, dy):
+                clear &= padded[radius + oy:radius + oy + rows, radius + ox:radius + ox + cols]
+            visible[:, index] = clear.ravel()
+        packed = np.packbits(visible, axis=1)
+        # Em bytes, a consulta de um só par não paga a indexação do NumPy.
+        self.stride = packed.shape[1]
+        self.bits = packed.tobytes()
+
+    def lookup(self, col0, row0, col1, row1):
+        """Visibilidade entre os dois tiles, ou None se estiverem fora da tabela."""
+        radius = self.radius
+        dx, dy = col1 - col0 + radius, row1 - row0 + radius
+        side = 2 * radius + 1
+        if not (0 <= dx < side and 0 <= dy < side and 0 <= col0 < self.cols and 0 <= row0 < self.rows):
+            return None
+        index = self.offset_index[dy * side + dx]
+        if index < 0:
+            return None
+        return self.bits[(row0 * self.cols + col0) * self.stride + (index >> 3)] >> (7 - (index & 7)) & 1 == 1
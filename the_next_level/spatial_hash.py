@@ -0,0 +1,57 @@
+# === GRELHA ESPACIAL ===
+# Broad-phase das colisões entre entidades: cada entidade fica registada na
+# célula do seu centro e as consultas só olham para as células vizinhas.
+
+class SpatialHash:
+    """Grelha uniforme de entidades, atualizada incrementalmente à medida que elas se movem.
+
+    `reach` é a maior meia largura (ou meia altura) das entidades registadas:
+    uma entidade só pode tocar num retângulo se o seu centro estiver a menos
+    de `reach` dele.
+    """
+    def __init__(self, cell_size, reach):
+        self.cell_size = cell_size
+        self.reach = reach
+        self.cells = {}        # célula -> lista de entidades
+        self.entity_cell = {}  # entidade -> célula onde está registada
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, entity, x, y):
+        cell = self.cell_of(x, y)
+        self.entity_cell[entity] = cell
+        self.cells.setdefault(cell, []).append(entity)
+        return cell
+
+    def remove(self, entity):
+        cell = self.entity_cell.pop(entity)
+        bucket = self.cells[cell]
+        bucket.remove(entity)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, entity, x, y):
+        """Atualiza a célula da entidade, só mexendo na grelha se ela mudou; devolve a célula."""
+        cell = int(x // self.cell_size), int(y // self.cell_size)
+        if cell != self.entity_cell[entity]:
+            self.remove(entity)
+            self.entity_cell[entity] = cell
+            self.cells.setdefault(cell, []).append(entity)
+        return cell
+
+    def cells_near(self, rect):
+        """Conjunto das células onde pode estar o centro de uma entidade que toque no retângulo."""
+        size, reach = self.cell_size, self.reach
+        first_col, first_row = int((rect.left - reach) // size), int((rect.top - reach) // size)
+        last_col, last_row = int((rect.right + reach) // size), int((rect.bottom + reach) // size)
+        return {(col, row) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)}
+
+    def query(self, rect):
+        """Lista das entidades registadas perto do retângulo (candidatas a colisão)."""
+        cells = self.cells
+        return [entity for cell in self.cells_near(rect) if cell in cells for entity in cells[cell]]
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cell.clear()
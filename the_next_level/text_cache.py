@@ -0,0 +1,45 @@
+# === CACHE DE TEXTO ===
+# Guarda as superfícies de texto já renderizadas (com contorno), para que o
+# HUD e os ecrãs estáticos não voltem a passar pelo ptext a cada frame.
+from collections import OrderedDict
+
+from pgzero import ptext
+
+POSITION_KEYWORDS = ('topleft', 'topright', 'bottomleft', 'bottomright', 'midtop', 'midleft',
+                     'midbottom', 'midright', 'center')
+
+class TextCache:
+    """Cache LRU de textos renderizados, por texto, tamanho, cor, contorno e posição."""
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def render(self, text, fontsize=None, color=None, owidth=None, ocolor=None, **position):
+        """Devolve a superfície do texto e o canto onde deve ser desenhada."""
+        anchor = next((name for name in POSITION_KEYWORDS if name in position), None)
+        if anchor is None:
+            raise TypeError("É preciso indicar uma posição (ex.: center=(x, y)).")
+        key = (text, fontsize, color, owidth, ocolor, anchor, tuple(position[anchor]))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        # Com surf=None o ptext só calcula a superfície e a posição, sem desenhar.
+        entry = ptext.draw(text, surf=None, fontsize=fontsize, color=color, owidth=owidth, ocolor=ocolor,
+                           **{anchor: position[anchor]})
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def draw(self, surface, text, **kwargs):
+        """Desenha o texto numa superfície pygame, com os mesmos argumentos de screen.draw.text."""
+        text_surface, pos = self.render(text, **kwargs)
+        surface.blit(text_surface, pos)
+
+    def clear(self):
+        self.entries.clear()
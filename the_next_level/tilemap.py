@@ -0,0 +1,75 @@
+# === MAPA DE TILES ===
+# O nível guardado como um array compacto de códigos de tile (um byte por
+# célula), com uma máscara de células sólidas calculada de uma só vez.
+
+# Códigos de tile; 0 é uma célula vazia (nada é desenhado).
+EMPTY = 0
+FLOOR = 1
+WALL = 2
+WALL_2 = 3
+DOOR = 4
+
+TILE_CODES = {'.': FLOOR, '#': WALL, 'X': WALL_2, 'D': DOOR}
+SOLID_CODES = (WALL, WALL_2)
+
+# Imagem partilhada por cada código de tile estático; a porta é um sprite à parte.
+TILE_IMAGES = {FLOOR: "floor", WALL: "wall", WALL_2: "wall_2"}
+
+# Tabelas de tradução byte a byte: caractere do mapa -> código, código -> sólido.
+_CHAR_TO_CODE = bytes(TILE_CODES.get(chr(i), EMPTY) for i in range(256))
+_CODE_TO_SOLID = bytes(1 if i in SOLID_CODES else 0 for i in range(256))
+_CODE_TO_CHAR = bytes(next((ord(c) for c, code in TILE_CODES.items() if code == i), ord(' ')) for i in range(256))
+
+class TileMap:
+    """Grelha de `width` x `height` tiles guardada em `tiles`, linha a linha."""
+    __slots__ = ('width', 'height', 'tiles', 'solid')
+
+    def __init__(self, width, height, tiles):
+        self.width = width
+        self.height = height
+        self.tiles = bytearray(tiles)
+        self.solid = self.tiles.translate(_CODE_TO_SOLID)
+
+    @classmethod
+    def from_rows(cls, level_map):
+        """Constrói o mapa a partir das linhas de texto de generate_random_map."""
+        raw = "".join(level_map).encode('ascii')
+        return cls.from_chars(len(level_map[0]) if level_map else 0, len(level_map), raw)
+
+    @classmethod
+    def from_chars(cls, width, height, chars):
+        """Constrói o mapa a partir dos caracteres do mapa em bytes, linha a linha (ver generate_maps)."""
+        return cls(width, height, chars.translate(_CHAR_TO_CODE))
+
+    def rows(self):
+        """Linhas de texto do mapa, como as de generate_random_map."""
+        text = self.tiles.translate(_CODE_TO_CHAR).decode('ascii')
+        return [text[start:start + self.width] for start in range(0, len(text), self.width)]
+
+    def index(self, col, row):
+        return row * self.width + col
+
+    def in_bounds(self, col, row):
+        return 0 <= col < self.width and 0 <= row < self.height
+
+    def tile_at(self, col, row):
+        """Código do tile na célula, ou EMPTY fora do mapa."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.tiles[row * self.width + col]
+        return EMPTY
+
+    def is_solid(self, col, row):
+        """Verdadeiro se a célula bloqueia o movimento (fora do mapa nada bloqueia)."""
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.solid[row * self.width + col] == 1
+        return False
+
+    def cells(self, code):
+        """Lista (col, row) de todas as células com o código dado."""
+        width, tiles = self.width, self.tiles
+        result = []
+        i = tiles.find(code)
+        while i >= 0:
+            result.append((i % width, i // width))
+            i = tiles.find(code, i + 1)
+        return result